@@ -0,0 +1,28 @@
+// Forwards JSON-RPC calls of long cached classes to the chain upstream and marks responses
+// with an error or a null result, so nginx doesn't cache them (see templates/rpc_cache.conf.j2)
+
+function check(r) {
+    r.subrequest('/upstream', { method: 'POST', body: r.requestText }, function (reply) {
+        if (!isCacheable(reply)) {
+            r.headersOut['X-Rpc-No-Cache'] = '1';
+        }
+        r.headersOut['Content-Type'] = 'application/json';
+        r.return(reply.status, reply.responseText);
+    });
+}
+
+function isCacheable(reply) {
+    if (reply.status !== 200) {
+        return false;
+    }
+    var data;
+    try {
+        data = JSON.parse(reply.responseText);
+    } catch (e) {
+        return false;
+    }
+    return data !== null && typeof data === 'object' && !('error' in data) &&
+        data.result !== null && data.result !== undefined;
+}
+
+export default { check };
@@ -23,6 +23,10 @@ ERROR_TIMEOUT = os.getenv('MONITOR_INTERVAL', 60)
 MONITOR_INTERVAL = os.getenv('MONITOR_INTERVAL', 10800)
 NETWORK_NAME = os.getenv('NETWORK_NAME', 'mainnet') or 'mainnet'
 ENDPOINT = os.environ['ETH_ENDPOINT']
+ENDPOINTS = [ENDPOINT] + [
+    url.strip() for url in os.getenv('ETH_FALLBACK_ENDPOINTS', '').split(',') if url.strip()
+]
+ETH_HEDGE_DELAY = float(os.getenv('ETH_HEDGE_DELAY', 1))
 
 PROXY_ENDPOINTS = {
     'mainnet': 'mainnet.skalenodes.com',
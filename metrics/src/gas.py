@@ -19,14 +19,15 @@
 
 import logging
 from web3 import Web3
-from src.config import ENDPOINT, GAS_ESTIMATION_ITERATIONS, BLOCK_SAMPLING
+from src.config import ENDPOINTS, ETH_HEDGE_DELAY, GAS_ESTIMATION_ITERATIONS, BLOCK_SAMPLING
+from src.eth_failover import EndpointPool, FailoverHTTPProvider
 
 logger = logging.getLogger(__name__)
 
 
 def init_w3():
-    logger.info(f'Connecting to {ENDPOINT}...')
-    return Web3(Web3.HTTPProvider(ENDPOINT))
+    logger.info(f'Connecting to {ENDPOINTS}...')
+    return Web3(FailoverHTTPProvider(EndpointPool(ENDPOINTS, hedge_delay=ETH_HEDGE_DELAY)))
 
 
 def calc_avg_gas_price():
@@ -0,0 +1,59 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from web3 import Web3
+
+from src.eth_failover import EndpointPool, EthEndpointsUnavailable, FailoverHTTPProvider
+
+BLOCK_NUMBER = 100
+
+
+class FakeEthHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        result = hex(1) if body['method'] == 'eth_chainId' else hex(BLOCK_NUMBER)
+        content = json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def eth_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeEthHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def dead_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}'
+
+
+def test_failover_provider(eth_url, dead_url):
+    pool = EndpointPool([dead_url, eth_url], hedge_delay=0)
+    w3 = Web3(FailoverHTTPProvider(pool))
+    for _ in range(3):
+        assert w3.eth.block_number == BLOCK_NUMBER
+    dead, healthy = pool.stats()
+    assert not dead['healthy']
+    assert healthy['requests'] == 3
+    assert pool.best_url() == eth_url
+
+
+def test_all_endpoints_unavailable(dead_url):
+    w3 = Web3(FailoverHTTPProvider(EndpointPool([dead_url], hedge_delay=0)))
+    with pytest.raises(EthEndpointsUnavailable):
+        w3.eth.block_number
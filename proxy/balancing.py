@@ -0,0 +1,64 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import re
+
+ROUND_ROBIN = 'round_robin'
+IP_HASH = 'ip_hash'
+LEAST_CONN = 'least_conn'
+RANDOM_TWO_LEAST_CONN = 'random_two_least_conn'
+HASH_HEADER_PREFIX = 'hash_header:'
+
+BALANCING_DIRECTIVES = {
+    ROUND_ROBIN: '',
+    IP_HASH: 'ip_hash;',
+    LEAST_CONN: 'least_conn;',
+    RANDOM_TWO_LEAST_CONN: 'random two least_conn;'
+}
+BACKUP_STRATEGIES = (ROUND_ROBIN, LEAST_CONN)
+
+HEADER_NAME_RE = re.compile(r'^[A-Za-z0-9-]+$')
+
+
+def balancing_directive(strategy: str) -> str:
+    """
+    Returns nginx upstream load balancing directive for the strategy:
+    round_robin, ip_hash, least_conn, random_two_least_conn or hash_header:<Header-Name>
+    """
+    if strategy in BALANCING_DIRECTIVES:
+        return BALANCING_DIRECTIVES[strategy]
+    if strategy.startswith(HASH_HEADER_PREFIX):
+        header = strategy.removeprefix(HASH_HEADER_PREFIX)
+        if HEADER_NAME_RE.match(header):
+            return f'hash $http_{header.lower().replace("-", "_")} consistent;'
+    raise ValueError(f'Unknown load balancing strategy: {strategy}')
+
+
+def is_valid_strategy(strategy: str) -> bool:
+    try:
+        balancing_directive(strategy)
+    except ValueError:
+        return False
+    return True
+
+
+def supports_backup(strategy: str) -> bool:
+    """nginx doesn't allow backup servers with hash, ip_hash and random balancing"""
+    return strategy in BACKUP_STRATEGIES
@@ -0,0 +1,142 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+from functools import partial
+from time import monotonic
+
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+from proxy.eth_failover import EthEndpointsUnavailable, RequestRejected
+from proxy.helper import (
+    BatchRejected, compose_batch_payload, make_batch_rpc_call, parse_batch_response
+)
+from proxy.request_timings import eth_request_timings
+from proxy.config import CALL_BATCH_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+BATCH_RETRY_INTERVAL = 3600
+
+# endpoint -> time after which batches are tried again
+_batch_unsupported_endpoints = {}
+
+
+class CallBatch:
+    """
+    Collects contract reads and sends them to the provider as JSON-RPC batches of eth_call
+    requests. Falls back to single calls if the endpoint rejects batches or a call fails.
+    Endpoints that reject batches get single calls for BATCH_RETRY_INTERVAL, transient
+    failures only affect the current chunk. Providers with make_batch_request (failover
+    provider) get batches too, so they are hedged and failed over as single requests are.
+    """
+
+    def __init__(self, max_size: int = CALL_BATCH_MAX_SIZE):
+        self.max_size = max_size
+        self.functions = []
+
+    def add(self, contract_function) -> int:
+        self.functions.append(contract_function)
+        return len(self.functions) - 1
+
+    def execute(self) -> list:
+        if not self.functions:
+            return []
+        endpoint, send = _get_batch_sender(self.functions[0])
+        if endpoint is None or not _accepts_batches(endpoint):
+            return [fn.call() for fn in self.functions]
+        results = []
+        for start in range(0, len(self.functions), self.max_size):
+            chunk = self.functions[start:start + self.max_size]
+            results.extend(self._execute_chunk(endpoint, send, chunk))
+        return results
+
+    def _execute_chunk(self, endpoint: str, send, functions: list) -> list:
+        calls = [('eth_call', [_encode_call(fn), 'latest']) for fn in functions]
+        try:
+            with eth_request_timings.time('eth_call_batch'):
+                responses = send(calls)
+        except BatchRejected as e:
+            logger.warning(f'{endpoint} does not accept batch requests ({e}), using single calls')
+            _batch_unsupported_endpoints[endpoint] = monotonic() + BATCH_RETRY_INTERVAL
+            return [fn.call() for fn in functions]
+        if responses is None:
+            logger.warning(f'Batch request to {endpoint} failed, using single calls')
+            return [fn.call() for fn in functions]
+        return [
+            _decode_or_call(fn, response)
+            for fn, response in zip(functions, responses)
+        ]
+
+
+def _get_batch_sender(contract_function) -> tuple:
+    """Returns endpoint name and a function that sends calls as one batch to it"""
+    web3 = getattr(contract_function, 'web3', None)
+    if web3 is None:
+        return None, None
+    provider = web3.provider
+    if hasattr(provider, 'make_batch_request'):
+        return str(provider), partial(_send_provider_batch, provider)
+    endpoint = getattr(provider, 'endpoint_uri', None)
+    return endpoint, partial(make_batch_rpc_call, endpoint)
+
+
+def _accepts_batches(endpoint: str) -> bool:
+    retry_at = _batch_unsupported_endpoints.get(endpoint)
+    return retry_at is None or retry_at <= monotonic()
+
+
+def _send_provider_batch(provider, calls: list):
+    try:
+        data = provider.make_batch_request(compose_batch_payload(calls))
+    except RequestRejected as e:
+        raise BatchRejected(str(e)) from e
+    except (EthEndpointsUnavailable, ValueError) as e:
+        logger.warning(f'Batch request to {provider} failed: {e}')
+        return None
+    return parse_batch_response(data, len(calls))
+
+
+def _encode_call(contract_function) -> dict:
+    return {
+        'to': contract_function.address,
+        'data': contract_function._encode_transaction_data()
+    }
+
+
+def _decode_or_call(contract_function, response):
+    if response is None or 'result' not in response:
+        return contract_function.call()
+    try:
+        return _decode_result(contract_function, response['result'])
+    except Exception as e:
+        logger.debug(f'Could not decode batched {contract_function.fn_name} result: {e}')
+        return contract_function.call()
+
+
+def _decode_result(contract_function, result: str):
+    output_types = get_abi_output_types(contract_function.abi)
+    output_data = contract_function.web3.codec.decode_abi(output_types, HexBytes(result))
+    normalized_data = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output_data)
+    if len(normalized_data) == 1:
+        return normalized_data[0]
+    return normalized_data
@@ -0,0 +1,75 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+
+from proxy.helper import read_json
+from proxy.balancing import is_valid_strategy
+from proxy.config import (
+    CHAIN_OVERRIDES_FILEPATH, KEEPALIVE_CONNECTIONS_PER_NODE, KEEPALIVE_MAX_CONNECTIONS,
+    KEEPALIVE_REQUESTS, KEEPALIVE_TIMEOUT, HTTP_BALANCING, WS_BALANCING, FS_BALANCING,
+    RPC_CACHE_ENABLED, RPC_CACHE_MAX_SIZE, RPC_CACHE_KEYS_ZONE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+ALL_CHAINS_KEY = '*'
+DEFAULT_BALANCING = {
+    'http_balancing': HTTP_BALANCING,
+    'ws_balancing': WS_BALANCING,
+    'fs_balancing': FS_BALANCING
+}
+
+
+def load_chain_overrides(path: str = CHAIN_OVERRIDES_FILEPATH) -> dict:
+    """
+    Loads per-chain settings overrides, file format:
+    {"*": {"keepalive_timeout": 30}, "chain-name": {"http_balancing": "least_conn"}}
+    Settings under "*" are applied to all chains, chain settings take precedence.
+    """
+    try:
+        return read_json(path)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.warning(f'Could not parse chain overrides file {path}: {e}')
+        return {}
+
+
+def get_chain_settings(chain_info: dict, overrides: dict) -> dict:
+    """Composes nginx settings for a chain from its metadata and overrides"""
+    nodes_number = max(len(chain_info['http_endpoints']), 1)
+    settings = {
+        'keepalive': min(KEEPALIVE_CONNECTIONS_PER_NODE * nodes_number, KEEPALIVE_MAX_CONNECTIONS),
+        'keepalive_requests': KEEPALIVE_REQUESTS,
+        'keepalive_timeout': KEEPALIVE_TIMEOUT,
+        'rpc_cache': RPC_CACHE_ENABLED,
+        'rpc_cache_max_size': RPC_CACHE_MAX_SIZE,
+        'rpc_cache_keys_zone_size': RPC_CACHE_KEYS_ZONE_SIZE,
+        **DEFAULT_BALANCING
+    }
+    settings.update(overrides.get(ALL_CHAINS_KEY, {}))
+    settings.update(overrides.get(chain_info['schain_name'], {}))
+    for key, default in DEFAULT_BALANCING.items():
+        if not is_valid_strategy(settings[key]):
+            logger.warning(f'Invalid {key} for {chain_info["schain_name"]}: {settings[key]}, \
+using {default}')
+            settings[key] = default
+    return settings
@@ -23,9 +23,20 @@ DIR_PATH = os.path.dirname(os.path.realpath(__file__))
 PROJECT_PATH = os.path.join(DIR_PATH, os.pardir)
 
 ENDPOINT = os.environ['ETH_ENDPOINT']
+ENDPOINTS = [ENDPOINT] + [
+    url.strip() for url in os.getenv('ETH_FALLBACK_ENDPOINTS', '').split(',') if url.strip()
+]
+ETH_HEDGE_DELAY = float(os.getenv('ETH_HEDGE_DELAY', 1))
+ETH_FAILOVER_MAX_COOLDOWN = float(os.getenv('ETH_FAILOVER_MAX_COOLDOWN', 60))
 PORTS_PER_SCHAIN = 64
 
-MONITOR_INTERVAL = os.getenv('MONITOR_INTERVAL', 60 * 60 * 2)
+MONITOR_INTERVAL = int(os.getenv('MONITOR_INTERVAL', 60 * 60 * 2))
+HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', 10))
+DISCOVERY_RETRY_INTERVAL = int(os.getenv('DISCOVERY_RETRY_INTERVAL', 60))
+DISCOVERY_CONCURRENCY = int(os.getenv('DISCOVERY_CONCURRENCY', 8))
+CHAIN_DISCOVERY_TIMEOUT = int(os.getenv('CHAIN_DISCOVERY_TIMEOUT', 120))
+DISCOVERY_BUDGET = int(os.getenv('DISCOVERY_BUDGET', 900))
+CALL_BATCH_MAX_SIZE = int(os.getenv('CALL_BATCH_MAX_SIZE', 100))
 
 HEARTBEAT_URL = os.getenv('HEARTBEAT_URL')
 
@@ -37,21 +48,86 @@ DATA_FOLDER = os.path.join(PROJECT_PATH, 'data')
 SM_ABI_DEFAULT_FILEPATH = os.path.join(DATA_FOLDER, 'abi.json')
 SM_ABI_FILEPATH = os.getenv('SM_ABI_FILEPATH', SM_ABI_DEFAULT_FILEPATH)
 
+REGISTRY_CACHE_FILEPATH = os.path.join(DATA_FOLDER, 'registry_cache.json')
+REGISTRY_FULL_REFRESH_INTERVAL = int(os.getenv('REGISTRY_FULL_REFRESH_INTERVAL', 60 * 60 * 24))
+REGISTRY_EVENT_UPDATES = os.getenv('REGISTRY_EVENT_UPDATES', 'false').lower() in ('1', 'true')
+EVENT_LOGS_MAX_RANGE = int(os.getenv('EVENT_LOGS_MAX_RANGE', 2000))
+EVENT_LOGS_MAX_BLOCKS = int(os.getenv('EVENT_LOGS_MAX_BLOCKS', 50000))
+
 TEMPLATES_FOLDER = os.path.join(PROJECT_PATH, 'templates')
 
 SCHAIN_NGINX_TEMPLATE = os.path.join(TEMPLATES_FOLDER, 'chain.conf.j2')
 UPSTREAM_NGINX_TEMPLATE = os.path.join(TEMPLATES_FOLDER, 'upstream.conf.j2')
+RPC_CACHE_NGINX_TEMPLATE = os.path.join(TEMPLATES_FOLDER, 'rpc_cache.conf.j2')
+
+CHAIN_OVERRIDES_FILEPATH = os.getenv(
+    'CHAIN_OVERRIDES_FILEPATH',
+    os.path.join(DATA_FOLDER, 'chain_overrides.json')
+)
+
+KEEPALIVE_CONNECTIONS_PER_NODE = int(os.getenv('KEEPALIVE_CONNECTIONS_PER_NODE', 16))
+KEEPALIVE_MAX_CONNECTIONS = int(os.getenv('KEEPALIVE_MAX_CONNECTIONS', 256))
+KEEPALIVE_REQUESTS = int(os.getenv('KEEPALIVE_REQUESTS', 10000))
+KEEPALIVE_TIMEOUT = int(os.getenv('KEEPALIVE_TIMEOUT', 60))
+
+HTTP_BALANCING = os.getenv('HTTP_BALANCING', 'ip_hash')
+WS_BALANCING = os.getenv('WS_BALANCING', 'ip_hash')
+FS_BALANCING = os.getenv('FS_BALANCING', 'ip_hash')
 
 CHAINS_FOLDER = os.path.join(PROJECT_PATH, 'conf', 'chains')
 UPSTREAMS_FOLDER = os.path.join(PROJECT_PATH, 'conf', 'upstreams')
-
-TMP_CHAINS_FOLDER = os.path.join(PROJECT_PATH, 'conf', 'tmp_chains')
-TMP_UPSTREAMS_FOLDER = os.path.join(PROJECT_PATH, 'conf', 'tmp_upstreams')
+STAGING_FOLDER = os.path.join(PROJECT_PATH, 'conf', 'staging')
+NGINX_CONF_FOLDER = '/etc/nginx/conf'
 
 PROXY_LOG_FORMAT = '[%(asctime)s] %(process)d %(levelname)s %(module)s: %(message)s'
 LONG_LINE = '=' * 100
 
 NGINX_CONTAINER_NAME = 'proxy_nginx'
 CONTAINER_RUNNING_STATUS = 'running'
+NGINX_RELOAD_MIN_INTERVAL = int(os.getenv('NGINX_RELOAD_MIN_INTERVAL', 30))
+NGINX_RELOAD_METHOD = os.getenv('NGINX_RELOAD_METHOD', 'exec')
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', '')
+TRACE_FILEPATH = os.getenv('TRACE_FILEPATH', os.path.join(DATA_FOLDER, 'traces.jsonl'))
+PROFILE_FOLDER = os.getenv('PROFILE_FOLDER', os.path.join(DATA_FOLDER, 'profiles'))
+PROFILE_CYCLE = os.getenv('PROFILE_CYCLE', 'false').lower() in ('1', 'true')
 
 ALLOWED_TIMESTAMP_DIFF = 300
+ALLOWED_BLOCK_LAG = int(os.getenv('ALLOWED_BLOCK_LAG', 100))
+SYNC_EVICT_AFTER = int(os.getenv('SYNC_EVICT_AFTER', 2))
+SYNC_READMIT_AFTER = int(os.getenv('SYNC_READMIT_AFTER', 3))
+SYNC_INFO_PORT_CHECK = os.getenv('SYNC_INFO_PORT_CHECK', 'false').lower() in ('1', 'true')
+SYNC_INFO_METHOD = os.getenv('SYNC_INFO_METHOD', 'eth_blockNumber')
+
+MAX_UPSTREAM_WEIGHT = int(os.getenv('MAX_UPSTREAM_WEIGHT', 8))
+SLOW_NODE_RTT_FACTOR = int(os.getenv('SLOW_NODE_RTT_FACTOR', 4))
+BACKUP_BLOCK_LAG = int(os.getenv('BACKUP_BLOCK_LAG', 10))
+RTT_EWMA_ALPHA = float(os.getenv('RTT_EWMA_ALPHA', 0.3))
+RTT_CHANGE_THRESHOLD = float(os.getenv('RTT_CHANGE_THRESHOLD', 0.25))
+SCORE_CHANGE_AFTER = int(os.getenv('SCORE_CHANGE_AFTER', 3))
+
+PROBE_CONCURRENCY = int(os.getenv('PROBE_CONCURRENCY', 64))
+PROBE_TIMEOUT = int(os.getenv('PROBE_TIMEOUT', 10))
+PROBE_POOL_HOSTS = int(os.getenv('PROBE_POOL_HOSTS', 4096))
+
+RPC_CACHE_ENABLED = os.getenv('RPC_CACHE_ENABLED', 'false').lower() in ('1', 'true')
+RPC_CACHE_PATH = os.getenv('RPC_CACHE_PATH', '/var/cache/nginx')
+RPC_CACHE_MAX_SIZE = os.getenv('RPC_CACHE_MAX_SIZE', '64m')
+RPC_CACHE_KEYS_ZONE_SIZE = os.getenv('RPC_CACHE_KEYS_ZONE_SIZE', '1m')
+RPC_CACHE_IMMUTABLE_TTL = int(os.getenv('RPC_CACHE_IMMUTABLE_TTL', 3600))
+RPC_CACHE_HISTORICAL_TTL = int(os.getenv('RPC_CACHE_HISTORICAL_TTL', 60))
+RPC_CACHE_RECENT_TTL = int(os.getenv('RPC_CACHE_RECENT_TTL', 1))
+RPC_CACHE_CHECK_PORT = int(os.getenv('RPC_CACHE_CHECK_PORT', 5080))
+
+UPSTREAM_RESOLVE_DOMAINS = os.getenv('UPSTREAM_RESOLVE_DOMAINS', 'true').lower() in ('1', 'true')
+DNS_CONCURRENCY = int(os.getenv('DNS_CONCURRENCY', 32))
+DNS_TIMEOUT = float(os.getenv('DNS_TIMEOUT', 5))
+DNS_MIN_TTL = int(os.getenv('DNS_MIN_TTL', 30))
+
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', 64))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 8))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.2))
@@ -0,0 +1,118 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import ipaddress
+import logging
+import socket
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.exception
+import dns.resolver
+
+from proxy import tracing
+from proxy.config import DNS_CONCURRENCY, DNS_TIMEOUT, DNS_MIN_TTL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DnsEntry:
+    addresses: tuple
+    expires_at: float
+
+
+def resolve_domain(domain: str, timeout: float = DNS_TIMEOUT) -> tuple:
+    """Returns sorted IPv4 addresses of the domain and the TTL of the record"""
+    try:
+        answer = dns.resolver.resolve(domain, 'A', lifetime=timeout)
+    except dns.exception.DNSException as e:
+        raise socket.gaierror(f'{domain}: {e}') from e
+    return tuple(sorted(record.address for record in answer)), answer.rrset.ttl
+
+
+class DnsCache:
+    """
+    Resolves node domains concurrently and keeps the addresses for the TTL of the record
+    (not less than min_ttl). If a domain can't be resolved, its last known addresses are kept.
+    """
+
+    def __init__(
+        self,
+        resolver=resolve_domain,
+        concurrency: int = DNS_CONCURRENCY,
+        min_ttl: int = DNS_MIN_TTL
+    ):
+        self.resolver = resolver
+        self.concurrency = concurrency
+        self.min_ttl = min_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve_many(self, domains: list) -> dict:
+        """Returns domain -> first address mapping, unresolved domains are mapped to None"""
+        now = monotonic()
+        domains = set(domains)
+        with self._lock:
+            due = [
+                domain for domain in domains
+                if domain not in self._entries or self._entries[domain].expires_at <= now
+            ]
+        if due:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(due))) as executor:
+                for domain, entry in zip(due, executor.map(tracing.profiled(self._lookup), due)):
+                    if entry is not None:
+                        with self._lock:
+                            self._entries[domain] = entry
+        with self._lock:
+            return {domain: self._first_address(domain) for domain in domains}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, domain: str):
+        if _is_ip_address(domain):
+            return DnsEntry(addresses=(domain,), expires_at=float('inf'))
+        try:
+            addresses, ttl = self.resolver(domain)
+        except (OSError, UnicodeError) as e:
+            logger.warning(f'Could not resolve {domain}: {e}')
+            return None
+        if not addresses:
+            logger.warning(f'{domain} has no A records')
+            return None
+        return DnsEntry(addresses=tuple(addresses), expires_at=monotonic() + max(ttl, self.min_ttl))
+
+    def _first_address(self, domain: str):
+        entry = self._entries.get(domain)
+        return entry.addresses[0] if entry else None
+
+
+def _is_ip_address(domain: str) -> bool:
+    try:
+        ipaddress.ip_address(domain)
+    except ValueError:
+        return False
+    return True
+
+
+dns_cache = DnsCache()
@@ -17,24 +17,41 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import copy
 import json
 import logging
+from collections import defaultdict
+from time import monotonic
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-import requests
-
-from web3 import Web3, HTTPProvider
 from Crypto.Hash import keccak
 
-from proxy.node_info import get_node_info
-from proxy.helper import read_json, make_rpc_call
-from proxy.config import ENDPOINT, SM_ABI_FILEPATH
+from proxy import monitoring, tracing
+from proxy.call_batch import CallBatch
+from proxy.dns_cache import dns_cache
+from proxy.node_info import NodeInfoCache, get_nodes_info
+from proxy.probe import probe_nodes
+from proxy.scoring import EndpointStats, ScoreTracker, latency_weight_model, score_tracker
+from proxy.sync_scoring import SyncTracker, check_sync, sync_tracker
+from proxy.registry_cache import RegistryCache
+from proxy.registry_client import get_registry_client
+from proxy.registry_events import (
+    TopologyChanges, apply_topology_changes, fetch_topology_changes
+)
+from proxy.config import (
+    ENDPOINTS, SM_ABI_FILEPATH, DISCOVERY_CONCURRENCY, REGISTRY_EVENT_UPDATES,
+    EVENT_LOGS_MAX_BLOCKS, CHAIN_DISCOVERY_TIMEOUT, DISCOVERY_BUDGET, SYNC_INFO_PORT_CHECK,
+    UPSTREAM_RESOLVE_DOMAINS
+)
 from proxy.str_formatters import arguments_list_string
 from proxy.schain_options import parse_schain_options
-from proxy.config import ALLOWED_TIMESTAMP_DIFF
 
 logger = logging.getLogger(__name__)
 
 
+DEADLINE_POLL_INTERVAL = 1
+PENDING = 'pending_readmission'
+
 URL_PREFIXES = {
     'http': 'http://',
     'https': 'https://',
@@ -45,34 +62,90 @@ URL_PREFIXES = {
 
 
 class ChainInfo:
-    def __init__(self, schain_name: str, nodes: list):
+    def __init__(
+        self,
+        schain_name: str,
+        nodes: list,
+        probes: list = None,
+        weight_model=latency_weight_model,
+        tracker: SyncTracker = sync_tracker,
+        addresses: dict = None,
+        scores: ScoreTracker = score_tracker
+    ):
         self.schain_name = schain_name
         self.chain_id = schain_name_to_network_id(schain_name)
+        self.stale = False
+        self.block_number = -1
         self.http_endpoints = []
         self.ws_endpoints = []
         self.fs_endpoints = []
-        self._format_nodes(nodes)
-
-    def _format_nodes(self, nodes):
-        for node in nodes:
-            http_endpoint = node['http_endpoint_domain']
-            node['block_ts'] = get_block_ts(http_endpoint)
-
-        max_ts = max(node['block_ts'] for node in nodes)
+        self.http_addresses = []
+        self.ws_addresses = []
+        self.fs_addresses = []
+        self.endpoint_stats = []
+        if probes is None:
+            probes = probe_nodes(*_probe_targets(nodes))
+        if addresses is None:
+            addresses = resolve_node_domains(nodes)
+        self._format_nodes(nodes, probes, tracker, addresses, scores)
+        self._score_endpoints(weight_model, scores)
+
+    def _format_nodes(
+        self,
+        nodes: list,
+        probes: list,
+        tracker: SyncTracker,
+        addresses: dict,
+        scores: ScoreTracker
+    ):
+        for node, probe in zip(nodes, probes):
+            node['block_ts'] = probe.block_ts
+
+        max_ts = max((node['block_ts'] for node in nodes), default=-1)
+        max_block_number = max((probe.block_number for probe in probes), default=-1)
         logger.info(f'max_ts: {max_ts}')
 
-        for node in nodes:
+        for node, probe in zip(nodes, probes):
             http_endpoint = node['http_endpoint_domain']
-            if not url_ok(http_endpoint):
-                logger.warning(f'{http_endpoint} is not accesible, removing from the list')
-                continue
-            if is_node_out_of_sync(node['block_ts'], max_ts):
-                logger.warning(f'{http_endpoint} ts: {node["block_ts"]}, max ts for chain: \
-{max_ts}, allowed timestamp diff: {ALLOWED_TIMESTAMP_DIFF}')
+            check = check_sync(probe, max_ts, max_block_number)
+            if not check.ok:
+                logger.warning(f'{http_endpoint} check failed: {", ".join(check.reasons)}, \
+ts: {probe.block_ts}, max ts: {max_ts}, block: {probe.block_number}, max block: {max_block_number}')
+            if not tracker.update(http_endpoint, check.ok):
+                logger.warning(f'{http_endpoint} is excluded from the list')
+                monitoring.record_dropped_node(check.reasons[0] if check.reasons else PENDING)
                 continue
             self.http_endpoints.append(http_endpoint.removeprefix(URL_PREFIXES['http']))
             self.ws_endpoints.append(node['ws_endpoint_domain'].removeprefix(URL_PREFIXES['ws']))
             self.fs_endpoints.append(node['domain'])
+            self._add_addresses(node, addresses.get(node['domain']))
+            self.endpoint_stats.append(EndpointStats(
+                endpoint=http_endpoint,
+                rtt=scores.smooth_rtt(http_endpoint, probe.rtt),
+                block_lag=max_block_number - probe.block_number
+            ))
+        # latest block every upstream node has, nginx caches reads of blocks below it
+        self.block_number = max_block_number - max(
+            (stats.block_lag for stats in self.endpoint_stats), default=max_block_number + 1)
+
+    def _add_addresses(self, node: dict, ip: str) -> None:
+        """Adds IP-based upstream addresses of the node, domains are used if it's unresolved"""
+        if ip is None:
+            self.http_addresses.append(self.http_endpoints[-1])
+            self.ws_addresses.append(self.ws_endpoints[-1])
+            self.fs_addresses.append(self.fs_endpoints[-1])
+            return
+        self.http_addresses.append(f'{ip}:{node["httpRpcPort"]}')
+        self.ws_addresses.append(f'{ip}:{node["wsRpcPort"]}')
+        self.fs_addresses.append(ip)
+
+    def _score_endpoints(self, weight_model, tracker: ScoreTracker):
+        scores = tracker.stabilize(
+            [stats.endpoint for stats in self.endpoint_stats],
+            weight_model(self.endpoint_stats)
+        )
+        self.weights = [score.weight for score in scores]
+        self.backup = [score.backup for score in scores]
 
     def to_dict(self):
         return {
@@ -80,31 +153,17 @@ class ChainInfo:
             'chain_id': self.chain_id,
             'http_endpoints': self.http_endpoints,
             'ws_endpoints': self.ws_endpoints,
-            'fs_endpoints': self.fs_endpoints
+            'fs_endpoints': self.fs_endpoints,
+            'http_addresses': self.http_addresses,
+            'ws_addresses': self.ws_addresses,
+            'fs_addresses': self.fs_addresses,
+            'weights': self.weights,
+            'backup': self.backup,
+            'block_number': self.block_number,
+            'stale': self.stale
         }
 
 
-def url_ok(url) -> bool:
-    try:
-        r = requests.head(url, timeout=10)
-        return bool(r.status_code)
-    except requests.exceptions.RequestException:
-        return False
-
-
-def is_node_out_of_sync(ts: int, compare_ts: int) -> bool:
-    return abs(compare_ts - ts) > ALLOWED_TIMESTAMP_DIFF
-
-
-def get_block_ts(http_endpoint: str) -> int:
-    res = make_rpc_call(http_endpoint, 'eth_getBlockByNumber', ['latest', False])
-    if res and res.json():
-        res_data = res.json()
-        latest_schain_timestamp_hex = res_data['result']['timestamp']
-        return int(latest_schain_timestamp_hex, 16)
-    return -1
-
-
 def schain_name_to_id(name: str) -> str:
     keccak_hash = keccak.new(data=name.encode("utf8"), digest_bits=256)
     return '0x' + keccak_hash.hexdigest()
@@ -126,66 +185,296 @@ def generate_endpoints_for_schain(
     schains_internal_contract,
     schains_contract,
     nodes_contract,
-    schain_hash
+    schain_hash,
+    node_cache: NodeInfoCache = None,
+    known_schain: dict = None,
+    probe: bool = True
 ):
-    """Generates endpoints list for a given SKALE chain"""
-    schain = schains_internal_contract.functions.schains(schain_hash).call()
-    schain_options_raw = schains_contract.functions.getOptions(schain_hash).call()
-
-    schain_options = parse_schain_options(
-        raw_options=schain_options_raw
-    )
-
-    schain.append(schain_options.multitransaction_mode)
-    schain.append(schain_options.threshold_encryption)
+    """
+    Generates endpoints list for a given SKALE chain.
+    If known_schain is provided, sChain struct and node group are taken from it.
+    If probe is False, nodes are not probed and chain_info is not added.
+    """
+    if known_schain:
+        schain, node_ids = list(known_schain['schain']), known_schain['node_ids']
+    else:
+        batch = CallBatch()
+        batch.add(schains_internal_contract.functions.schains(schain_hash))
+        batch.add(schains_contract.functions.getOptions(schain_hash))
+        batch.add(schains_internal_contract.functions.getNodesInGroup(schain_hash))
+        schain_raw, schain_options_raw, node_ids = batch.execute()
+        schain = _format_schain(schain_raw, schain_options_raw)
 
     logger.info(f'Going to generate endpoints for sChain: {schain[0]}')
 
-    node_ids = schains_internal_contract.functions.getNodesInGroup(schain_hash).call()
-    nodes = []
-    for node_id in node_ids:
-        node = get_node_info(
-            schain_hash=schain_hash,
-            node_id=node_id,
-            nodes_contract=nodes_contract,
-            schains_internal_contract=schains_internal_contract
-        )
+    nodes = get_nodes_info(
+        schain_hash=schain_hash,
+        node_ids=node_ids,
+        nodes_contract=nodes_contract,
+        schains_internal_contract=schains_internal_contract,
+        node_cache=node_cache
+    )
+    for node in nodes:
         _compose_endpoints(node, endpoint_type='ip')
         _compose_endpoints(node, endpoint_type='domain')
-        nodes.append(node)
-    return {
-        'schain': schain,
-        'nodes': nodes,
-        'chain_info': ChainInfo(schain[0], nodes).to_dict()
-    }
+    schain_endpoints = {'schain': schain, 'nodes': nodes}
+    if probe:
+        schain_endpoints['chain_info'] = ChainInfo(schain[0], nodes).to_dict()
+    return schain_endpoints
+
+
+def probe_schains(schains_endpoints: list) -> None:
+    """Probes nodes of all sChains at once and adds chain_info to each sChain"""
+    nodes = [node for schain_endpoints in schains_endpoints for node in schain_endpoints['nodes']]
+    with tracing.span('probe_nodes', nodes=len(nodes)) as probe_span:
+        results = probe_nodes(*_probe_targets(nodes))
+        served = {node['http_endpoint_domain'] for node in nodes}
+        sync_tracker.retain(served)
+        score_tracker.retain(served)
+        probe_span.set_attribute('dead', sum(not result.alive for result in results))
+    addresses = resolve_node_domains(nodes)
+    probes = iter(results)
+    for schain_endpoints in schains_endpoints:
+        schain_probes = [next(probes) for _ in schain_endpoints['nodes']]
+        chain_info = ChainInfo(
+            schain_endpoints['schain'][0], schain_endpoints['nodes'], schain_probes,
+            addresses=addresses
+        )
+        chain_info.stale = schain_endpoints.get('stale', False)
+        schain_endpoints['chain_info'] = chain_info.to_dict()
+
+
+def _probe_targets(nodes: list) -> tuple:
+    http_endpoints = [node['http_endpoint_domain'] for node in nodes]
+    if not SYNC_INFO_PORT_CHECK:
+        return http_endpoints, None
+    return http_endpoints, [node['infoHttp_endpoint_domain'] for node in nodes]
+
+
+def resolve_node_domains(nodes: list) -> dict:
+    """Resolves domains of the nodes using the shared DNS cache"""
+    if not UPSTREAM_RESOLVE_DOMAINS:
+        return {}
+    domains = {node['domain'] for node in nodes}
+    with tracing.span('resolve_domains', domains=len(domains)) as resolve_span:
+        addresses = dns_cache.resolve_many(domains)
+        resolve_span.set_attribute(
+            'unresolved', sum(address is None for address in addresses.values()))
+    return addresses
+
+
+def public_endpoints(schains_endpoints: list) -> list:
+    """Endpoints for chains.json without upstream weights and block number that change often"""
+    return [
+        {**e, 'chain_info': {
+            k: v for k, v in e['chain_info'].items() if k not in ('weights', 'block_number')}}
+        if e else e
+        for e in schains_endpoints
+    ]
 
 
-def init_contracts(web3: Web3, sm_abi: str):
-    schains_internal_contract = web3.eth.contract(
-        address=sm_abi['schains_internal_address'],
-        abi=sm_abi['schains_internal_abi']
-    )
-    schains_contract = web3.eth.contract(
-        address=sm_abi['schains_address'],
-        abi=sm_abi['schains_abi']
+def _format_schain(schain: list, schain_options_raw: list) -> list:
+    schain_options = parse_schain_options(
+        raw_options=schain_options_raw
     )
-    nodes_contract = web3.eth.contract(
-        address=sm_abi['nodes_address'],
-        abi=sm_abi['nodes_abi']
+    schain.append(schain_options.multitransaction_mode)
+    schain.append(schain_options.threshold_encryption)
+    return schain
+
+
+def refresh_chains_info(schains_endpoints: list) -> bool:
+    """
+    Re-probes nodes of the already discovered sChains and updates their chain_info.
+    Returns True if the list of healthy endpoints, their addresses or backup flags changed for
+    any sChain. Weight changes alone don't count, they are applied with the next config update.
+    """
+    previous = [_healthy_endpoints(e['chain_info']) for e in schains_endpoints]
+    probe_schains(schains_endpoints)
+    current = [_healthy_endpoints(e['chain_info']) for e in schains_endpoints]
+    return previous != current
+
+
+def _healthy_endpoints(chain_info: dict) -> tuple:
+    return (
+        chain_info['http_endpoints'],
+        chain_info['ws_endpoints'],
+        chain_info['fs_endpoints'],
+        chain_info.get('http_addresses'),
+        chain_info.get('ws_addresses'),
+        chain_info.get('fs_addresses'),
+        chain_info['backup']
     )
-    return schains_internal_contract, schains_contract, nodes_contract
 
 
-def generate_endpoints(endpoint: str, abi_filepath: str) -> list:
-    """Main function that generates endpoints for all SKALE Chains on the given network"""
-    provider = HTTPProvider(endpoint)
-    web3 = Web3(provider)
-    sm_abi = read_json(abi_filepath)
-
-    schains_internal_contract, schains_contract, nodes_contract = init_contracts(
-        web3=web3,
-        sm_abi=sm_abi
-    )
+def discover_schains(
+    schains_internal_contract,
+    schains_contract,
+    nodes_contract,
+    schain_hashes: list,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    node_cache: NodeInfoCache = None,
+    known_schains: dict = None,
+    chain_timeout: float = CHAIN_DISCOVERY_TIMEOUT,
+    budget: float = DISCOVERY_BUDGET
+) -> list:
+    """
+    Generates endpoints for the given sChains using a bounded pool of workers.
+    Nodes of all sChains are probed together once contract reads are done.
+    Results are returned in the same order as schain_hashes, sChains that failed, took more
+    than chain_timeout or didn't finish within the budget are returned as None.
+    """
+    known_schains = known_schains or {}
+    start_times = {}
+
+    @tracing.profiled
+    def discover(schain_hash):
+        start_times[schain_hash] = start = monotonic()
+        try:
+            schain_endpoints = generate_endpoints_for_schain(
+                schains_internal_contract, schains_contract, nodes_contract, schain_hash,
+                node_cache, known_schains.get(schain_hash), probe=False
+            )
+        except Exception:
+            logger.exception(f'Could not generate endpoints for sChain {schain_hash.hex()}')
+            return None
+        monitoring.observe_chain_discovery(schain_endpoints['schain'][0], monotonic() - start)
+        return schain_endpoints
+
+    with tracing.span('registry_read', chains=len(schain_hashes), concurrency=concurrency):
+        executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+        try:
+            futures = [executor.submit(discover, schain_hash) for schain_hash in schain_hashes]
+            schains_endpoints = _wait_with_deadlines(
+                futures, schain_hashes, start_times, chain_timeout, monotonic() + budget)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    with monitoring.time_stage('probe'):
+        probe_schains([e for e in schains_endpoints if e is not None])
+    return schains_endpoints
+
+
+def _wait_with_deadlines(
+    futures: list,
+    schain_hashes: list,
+    start_times: dict,
+    chain_timeout: float,
+    deadline: float
+) -> list:
+    """Collects results of futures, giving up on the ones that run past their deadlines"""
+    results = [None] * len(futures)
+    pending = {future: index for index, future in enumerate(futures)}
+    while pending:
+        now = monotonic()
+        if now >= deadline:
+            logger.warning(f'Discovery budget is exceeded, {len(pending)} sChains are skipped')
+            break
+        for future, index in list(pending.items()):
+            start = start_times.get(schain_hashes[index])
+            if start is not None and now - start > chain_timeout:
+                logger.warning(f'sChain {schain_hashes[index].hex()} discovery timed out')
+                del pending[future]
+        done, _ = wait(
+            pending,
+            timeout=min(DEADLINE_POLL_INTERVAL, chain_timeout, deadline - now),
+            return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            results[pending.pop(future)] = future.result()
+    return results
+
+
+def fill_stale_schains(
+    schain_hashes: list,
+    schains_endpoints: list,
+    previous_endpoints: list,
+    known_schains: dict
+) -> list:
+    """
+    Replaces sChains that couldn't be discovered with their previous endpoints marked as
+    stale. sChains without previous endpoints stay None.
+    """
+    previous = {e['schain'][0]: e for e in previous_endpoints or [] if e}
+    filled = []
+    for schain_hash, schain_endpoints in zip(schain_hashes, schains_endpoints):
+        if schain_endpoints is None and schain_hash in known_schains:
+            last_good = previous.get(known_schains[schain_hash]['schain'][0])
+            if last_good is not None:
+                schain_endpoints = copy.deepcopy(last_good)
+                schain_endpoints['stale'] = True
+                schain_endpoints['chain_info']['stale'] = True
+        filled.append(schain_endpoints)
+    return filled
+
+
+def refresh_registry(
+    schains_internal_contract,
+    schains_contract,
+    nodes_contract,
+    schain_hashes: list,
+    registry_cache: RegistryCache
+) -> tuple:
+    """
+    Re-reads only the parts of the cached topology that could have changed: node groups of
+    all sChains, structs of new sChains and domain names of known nodes. Node records are
+    re-read only for new nodes, nodes with changed domains and nodes that got a new sChain.
+    Returns known sChains and a node info cache seeded with still valid node records.
+    """
+    new_hashes = [h for h in schain_hashes if h not in registry_cache.schains]
+    cached_node_ids = list(registry_cache.nodes)
+
+    batch = CallBatch()
+    for schain_hash in schain_hashes:
+        batch.add(schains_internal_contract.functions.getNodesInGroup(schain_hash))
+    for schain_hash in new_hashes:
+        batch.add(schains_internal_contract.functions.schains(schain_hash))
+        batch.add(schains_contract.functions.getOptions(schain_hash))
+    for node_id in cached_node_ids:
+        batch.add(nodes_contract.functions.getNodeDomainName(node_id))
+    results = batch.execute()
+
+    groups = dict(zip(schain_hashes, results[:len(schain_hashes)]))
+    results = results[len(schain_hashes):]
+    new_schains = {
+        schain_hash: _format_schain(results[2 * index], results[2 * index + 1])
+        for index, schain_hash in enumerate(new_hashes)
+    }
+    domains = dict(zip(cached_node_ids, results[2 * len(new_hashes):]))
+
+    known_schains = {}
+    node_schains = defaultdict(set)
+    for schain_hash in schain_hashes:
+        schain = new_schains.get(schain_hash) or registry_cache.schains[schain_hash]['schain']
+        known_schains[schain_hash] = {'schain': schain, 'node_ids': groups[schain_hash]}
+        for node_id in groups[schain_hash]:
+            node_schains[node_id].add(schain_hash)
+
+    valid_records = {}
+    for node_id, record in registry_cache.nodes.items():
+        if node_id not in node_schains or record['domain'] != domains[node_id]:
+            continue
+        if not node_schains[node_id].issubset(record['schain_hashes']):
+            continue
+        valid_records[node_id] = record
+    logger.info(f'Registry refreshed: {len(new_hashes)} new sChains, \
+{len(registry_cache.schains) - len(schain_hashes) + len(new_hashes)} removed sChains, \
+{len(node_schains) - len(valid_records)} nodes to re-read')
+    return known_schains, NodeInfoCache(valid_records)
+
+
+def generate_endpoints(
+    endpoints: list,
+    abi_filepath: str,
+    registry_cache: RegistryCache = None,
+    previous_endpoints: list = None
+) -> list:
+    """
+    Main function that generates endpoints for all SKALE Chains on the given network.
+    If registry_cache is provided, topology is refreshed incrementally and saved back to it.
+    Registry cache is not updated if some sChains couldn't be discovered, so they are re-read
+    on the next cycle.
+    """
+    client = get_registry_client(endpoints, abi_filepath)
+    schains_internal_contract, schains_contract, nodes_contract = client.contracts()
 
     logger.info(arguments_list_string({
         'nodes': nodes_contract.address,
@@ -193,18 +482,170 @@ def generate_endpoints(endpoint: str, abi_filepath: str) -> list:
         'schains': schains_contract.address
         }, 'Contracts inited'))
 
-    schain_hashes = schains_internal_contract.functions.getSchains().call()
+    client.timings.reset()
+    schains_endpoints = collect_endpoints(
+        schains_internal_contract, schains_contract, nodes_contract,
+        block_number=client.block_number,
+        registry_cache=registry_cache,
+        previous_endpoints=previous_endpoints
+    )
+    for method, stats in client.timings.stats().items():
+        logger.info(arguments_list_string(stats, f'{method} requests'))
+    for stats in client.pool.stats():
+        logger.info(arguments_list_string(stats, 'ETH endpoint'))
+    return schains_endpoints
+
+
+def collect_endpoints(
+    schains_internal_contract,
+    schains_contract,
+    nodes_contract,
+    block_number: int,
+    registry_cache: RegistryCache = None,
+    previous_endpoints: list = None
+) -> list:
+    """
+    Generates endpoints for all sChains, using registry_cache to skip unchanged reads.
+    sChains that couldn't be discovered keep their previous_endpoints marked as stale.
+    """
+    contracts = (schains_internal_contract, schains_contract, nodes_contract)
+    known_schains, node_cache = None, NodeInfoCache()
+    cached_schains = dict(registry_cache.schains) if registry_cache is not None else {}
+    with tracing.span('registry_refresh', block_number=block_number) as refresh_span:
+        if registry_cache is None or registry_cache.needs_full_refresh():
+            logger.info(f'Full registry scan at block {block_number}')
+            refresh_span.set_attribute('mode', 'full')
+            schain_hashes = schains_internal_contract.functions.getSchains().call()
+        elif registry_cache.block_number == block_number:
+            logger.info(f'Registry is unchanged since block {block_number}, using cached topology')
+            refresh_span.set_attribute('mode', 'cached')
+            schain_hashes = _with_unresolved(list(registry_cache.schains), registry_cache)
+            known_schains = registry_cache.schains
+            node_cache = NodeInfoCache(registry_cache.nodes)
+        else:
+            changes = None
+            if REGISTRY_EVENT_UPDATES:
+                changes = read_topology_changes(contracts, registry_cache, block_number)
+            if changes is not None:
+                logger.info(f'Applying registry events from block {registry_cache.block_number} \
+to {block_number}')
+                refresh_span.set_attribute('mode', 'events')
+                if changes.schain_list_changed:
+                    schain_hashes = schains_internal_contract.functions.getSchains().call()
+                else:
+                    schain_hashes = _with_unresolved(list(registry_cache.schains), registry_cache)
+                new_groups = read_new_groups(
+                    schains_internal_contract, schain_hashes, registry_cache)
+                known_schains, node_cache = apply_topology_changes(
+                    changes, registry_cache, schain_hashes, new_groups)
+            else:
+                logger.info(f'Refreshing registry from block {registry_cache.block_number} \
+to {block_number}')
+                refresh_span.set_attribute('mode', 'incremental')
+                schain_hashes = schains_internal_contract.functions.getSchains().call()
+                known_schains, node_cache = refresh_registry(
+                    *contracts, schain_hashes, registry_cache)
+
+    if known_schains is not None:
+        known_schains = {
+            schain_hash: schain for schain_hash, schain in known_schains.items()
+            if schain_hash not in registry_cache.unresolved
+        }
+    logger.info(f'Number of sChains: {len(schain_hashes)}, concurrency: {DISCOVERY_CONCURRENCY}')
+    endpoints = discover_schains(
+        *contracts, schain_hashes, node_cache=node_cache, known_schains=known_schains)
+    logger.info(arguments_list_string(node_cache.stats(), 'Node info cache'))
+
+    failed = [h for h, result in zip(schain_hashes, endpoints) if result is None]
+    if registry_cache is not None:
+        schains = {h: cached_schains[h] for h in failed if h in cached_schains}
+        schains.update({
+            schain_hash: {
+                'schain': schain_endpoints['schain'],
+                'node_ids': [node['id'] for node in schain_endpoints['nodes']]
+            }
+            for schain_hash, schain_endpoints in zip(schain_hashes, endpoints)
+            if schain_endpoints is not None
+        })
+        registry_cache.update(
+            block_number=block_number,
+            schains=schains,
+            nodes=node_cache.records(),
+            full_refresh=known_schains is None,
+            unresolved=failed
+        )
+        registry_cache.save()
+    if failed:
+        logger.warning(f'{len(failed)} sChains could not be discovered, using last known endpoints')
+        known_names = {**cached_schains, **(known_schains or {})}
+        endpoints = fill_stale_schains(schain_hashes, endpoints, previous_endpoints, known_names)
 
-    logger.info(f'Number of sChains: {len(schain_hashes)}')
-    endpoints = [
-        generate_endpoints_for_schain(
-            schains_internal_contract, schains_contract, nodes_contract, schain_hash)
-        for schain_hash in schain_hashes
-    ]
     endpoints = list(filter(lambda item: item is not None, endpoints))  # TODO: hotfix!
     return endpoints
 
 
+def _with_unresolved(schain_hashes: list, registry_cache: RegistryCache) -> list:
+    return schain_hashes + [h for h in registry_cache.unresolved if h not in schain_hashes]
+
+
+def poll_topology_changes(
+    endpoints: list,
+    abi_filepath: str,
+    registry_cache: RegistryCache
+) -> bool:
+    """
+    Checks SKALE Manager events since the cached block. If there are none, the cache is moved
+    to the latest block, so the next scan uses cached topology as is.
+    Returns True if topology changed and a new scan is needed.
+    """
+    if registry_cache.is_empty:
+        return False
+    client = get_registry_client(endpoints, abi_filepath)
+    block_number = client.block_number
+    if block_number <= registry_cache.block_number:
+        return False
+    changes = read_topology_changes(client.contracts(), registry_cache, block_number)
+    if changes is None:
+        return False
+    if changes.is_empty:
+        registry_cache.block_number = block_number
+        registry_cache.save()
+        return False
+    logger.info(f'Topology changed at blocks {registry_cache.block_number + 1}-{block_number}: \
+{changes.to_dict()}')
+    return True
+
+
+def read_new_groups(
+    schains_internal_contract,
+    schain_hashes: list,
+    registry_cache: RegistryCache
+) -> dict:
+    new_hashes = [h for h in schain_hashes if h not in registry_cache.schains]
+    batch = CallBatch()
+    for schain_hash in new_hashes:
+        batch.add(schains_internal_contract.functions.getNodesInGroup(schain_hash))
+    return dict(zip(new_hashes, batch.execute()))
+
+
+def read_topology_changes(
+    contracts: tuple,
+    registry_cache: RegistryCache,
+    block_number: int
+) -> TopologyChanges:
+    """Returns changes since the cached block or None if events can't be used"""
+    if block_number - registry_cache.block_number > EVENT_LOGS_MAX_BLOCKS:
+        logger.info(f'Registry cache is more than {EVENT_LOGS_MAX_BLOCKS} blocks behind, \
+events are not used')
+        return None
+    try:
+        with tracing.span('read_events', blocks=block_number - registry_cache.block_number):
+            return fetch_topology_changes(contracts, registry_cache.block_number + 1, block_number)
+    except Exception as e:
+        logger.warning(f'Could not read SKALE Manager events: {e}')
+        return None
+
+
 if __name__ == '__main__':
-    schains_endpoints = generate_endpoints(ENDPOINT, SM_ABI_FILEPATH)
+    schains_endpoints = generate_endpoints(ENDPOINTS, SM_ABI_FILEPATH)
     print(json.dumps(schains_endpoints, indent=4))
@@ -0,0 +1,240 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# The same module is used by proxy/eth_failover.py and metrics/src/eth_failover.py,
+# both copies must stay identical below the license header (checked in tests)
+
+import json
+import logging
+import threading
+from time import monotonic
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from web3.providers.base import JSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_HEDGE_DELAY = 1.0
+BASE_COOLDOWN = 1.0
+DEFAULT_MAX_COOLDOWN = 60.0
+LATENCY_EWMA_ALPHA = 0.3
+MAX_IN_FLIGHT = 2
+DEFAULT_CONCURRENCY = 16
+TOO_MANY_REQUESTS = 429
+
+
+class EthEndpointsUnavailable(Exception):
+    pass
+
+
+class RequestRejected(Exception):
+    """Endpoint answered with a client error, the same request won't succeed elsewhere"""
+
+
+class EndpointState:
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = None
+        self.failures = 0
+        self.requests = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, elapsed: float) -> None:
+        self.requests += 1
+        self.failures = 0
+        self.cooldown_until = 0.0
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (elapsed - self.latency)
+
+    def record_failure(self, max_cooldown: float) -> None:
+        self.requests += 1
+        self.failures += 1
+        cooldown = min(BASE_COOLDOWN * 2 ** (self.failures - 1), max_cooldown)
+        self.cooldown_until = monotonic() + cooldown
+
+    def is_healthy(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def to_dict(self) -> dict:
+        return {
+            'url': self.url,
+            'latency': None if self.latency is None else round(self.latency, 4),
+            'failures': self.failures,
+            'requests': self.requests,
+            'healthy': self.is_healthy(monotonic())
+        }
+
+
+class EndpointPool:
+    """
+    Sends JSON-RPC requests to the fastest healthy endpoint out of several equivalent ones.
+    If the response takes longer than hedge_delay, the same request is sent to the next
+    endpoint and the first successful response wins. Failed endpoints are skipped for an
+    exponentially growing cooldown, endpoints without measured latency are tried first.
+    concurrency is the number of threads that use the pool at the same time, each of them
+    can have MAX_IN_FLIGHT requests running.
+    """
+
+    def __init__(
+        self,
+        urls: list,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY,
+        timeout=DEFAULT_TIMEOUT,
+        max_cooldown: float = DEFAULT_MAX_COOLDOWN,
+        session: requests.Session = None,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ):
+        if not urls:
+            raise ValueError('At least one endpoint is required')
+        self.endpoints = [EndpointState(url) for url in urls]
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.max_cooldown = max_cooldown
+        self.session = session or requests.Session()
+        self.hedged = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency * MAX_IN_FLIGHT,
+            thread_name_prefix='eth-endpoint'
+        )
+
+    @property
+    def urls(self) -> list:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def ranked(self) -> list:
+        """Healthy endpoints by latency, then the ones in cooldown by time left"""
+        now = monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.is_healthy(now)]
+            unhealthy = [e for e in self.endpoints if not e.is_healthy(now)]
+            healthy.sort(key=lambda e: e.latency or 0)
+            unhealthy.sort(key=lambda e: e.cooldown_until)
+        return healthy + unhealthy
+
+    def best_url(self) -> str:
+        return self.ranked()[0].url
+
+    def request(self, data: bytes, raise_client_errors: bool = False) -> bytes:
+        """
+        Returns response body of the first endpoint that answered successfully.
+        With raise_client_errors, a 4xx answer (except 429) raises RequestRejected instead
+        of trying the next endpoint.
+        """
+        candidates = self.ranked()
+        in_flight = {}
+        next_index, last_error = 0, None
+        while True:
+            if not in_flight:
+                if next_index >= len(candidates):
+                    raise EthEndpointsUnavailable(
+                        f'All ETH endpoints failed: {last_error}') from last_error
+                endpoint = candidates[next_index]
+                in_flight[self._submit(endpoint, data, raise_client_errors)] = endpoint
+                next_index += 1
+            can_hedge = self.hedge_delay and next_index < len(candidates) and \
+                len(in_flight) < MAX_IN_FLIGHT
+            done, _ = wait(
+                in_flight,
+                timeout=self.hedge_delay if can_hedge else None,
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                logger.debug(f'{candidates[next_index - 1].url} is slow, hedging request')
+                self.hedged += 1
+                endpoint = candidates[next_index]
+                in_flight[self._submit(endpoint, data, raise_client_errors)] = endpoint
+                next_index += 1
+                continue
+            for future in done:
+                endpoint = in_flight.pop(future)
+                try:
+                    return future.result()
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f'Request to {endpoint.url} failed: {e}')
+                    last_error = e
+
+    def stats(self) -> list:
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
+
+    def _submit(self, endpoint: EndpointState, data: bytes, raise_client_errors: bool):
+        return self._executor.submit(self._send, endpoint, data, raise_client_errors)
+
+    def _send(self, endpoint: EndpointState, data: bytes, raise_client_errors: bool) -> bytes:
+        start = monotonic()
+        try:
+            resp = self.session.post(
+                endpoint.url,
+                data=data,
+                headers={'Content-Type': 'application/json'},
+                timeout=self.timeout
+            )
+            if raise_client_errors and 400 <= resp.status_code < 500 and \
+                    resp.status_code != TOO_MANY_REQUESTS:
+                with self._lock:
+                    endpoint.record_success(monotonic() - start)
+                raise RequestRejected(f'{endpoint.url} answered {resp.status_code}')
+            resp.raise_for_status()
+        except requests.exceptions.RequestException:
+            with self._lock:
+                endpoint.record_failure(self.max_cooldown)
+            raise
+        with self._lock:
+            endpoint.record_success(monotonic() - start)
+        return resp.content
+
+
+class FailoverHTTPProvider(JSONBaseProvider):
+    """Web3 provider that sends requests through EndpointPool"""
+
+    def __init__(self, pool: EndpointPool):
+        super().__init__()
+        self.pool = pool
+
+    @property
+    def endpoint_uri(self) -> str:
+        return self.pool.best_url()
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        raw_response = self.pool.request(request_data)
+        return self.decode_rpc_response(raw_response)
+
+    def make_batch_request(self, batch: list):
+        """Sends a list of JSON-RPC requests as one batch and returns decoded response"""
+        raw_response = self.pool.request(json.dumps(batch).encode(), raise_client_errors=True)
+        return json.loads(raw_response)
+
+    def isConnected(self) -> bool:
+        return self.is_connected()
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            response = self.make_request('web3_clientVersion', [])
+        except Exception:
+            return False
+        return 'result' in response
+
+    def __str__(self) -> str:
+        return f'Failover provider {self.pool.urls}'
@@ -17,16 +17,32 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 import sys
+import gzip
 import json
 import socket
+import hashlib
 import logging
+import threading
+import brotli
 import requests
 from logging import Formatter, StreamHandler
 
 from jinja2 import Environment
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from proxy.config import PROXY_LOG_FORMAT
+from proxy.config import (
+    PROXY_LOG_FORMAT, HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_RETRY_BACKOFF
+)
+
+TOO_MANY_REQUESTS = 429
+
+
+class BatchRejected(Exception):
+    """Endpoint answered that it doesn't accept JSON-RPC batch requests"""
 
 
 def read_json(path, mode='r'):
@@ -35,27 +51,133 @@ def read_json(path, mode='r'):
 
 
 def write_json(path, content):
-    with open(path, 'w') as outfile:
-        json.dump(content, outfile, indent=4)
+    write_file_atomic(path, json.dumps(content, indent=4))
+
+
+def publish_json(path, content) -> bool:
+    """
+    Writes compact JSON together with pre-compressed .gz and .br siblings (for nginx
+    gzip_static/brotli_static) and a .sha256 file with the content hash. Files are not
+    touched if the content is unchanged, so ETag and Last-Modified stay stable.
+    Returns True if the files were written.
+    """
+    data = json.dumps(content, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    if read_file(f'{path}.sha256') == digest and os.path.exists(path):
+        return False
+    write_file_atomic(f'{path}.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    write_file_atomic(f'{path}.br', brotli.compress(data))
+    write_file_atomic(path, data)
+    write_file_atomic(f'{path}.sha256', digest)
+    return True
 
 
 def ip_from_bytes(bytes):
     return socket.inet_ntoa(bytes)
 
 
-def process_template(source, destination, data):
+class TemplateRenderer:
+    """
+    Compiles j2 templates once per process and keeps them in memory.
+    A template is recompiled only when its file modification time changes.
+    """
+
+    def __init__(self):
+        self.compilations = 0
+        self._environment = Environment()
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get_template(self, source):
+        mtime = os.stat(source).st_mtime_ns
+        with self._lock:
+            cached = self._templates.get(source)
+            if cached is None or cached[0] != mtime:
+                with open(source) as template_file:
+                    template = self._environment.from_string(template_file.read())
+                self._templates[source] = cached = (mtime, template)
+                self.compilations += 1
+            return cached[1]
+
+    def render(self, source, data) -> str:
+        return self.get_template(source).render(data)
+
+    def render_many(self, source, items) -> list:
+        template = self.get_template(source)
+        return [template.render(data) for data in items]
+
+
+template_renderer = TemplateRenderer()
+
+
+def read_file(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_file_atomic(path, content):
+    """
+    Writes content to a temporary file in the same folder, flushes it to disk and renames it
+    to path, so readers see either the old or the new file, never a partially written one.
+    """
+    folder, filename = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(folder, f'.{filename}.tmp')
+    mode = 'wb' if isinstance(content, bytes) else 'w'
+    try:
+        with open(tmp_path, mode) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_folder(folder)
+
+
+def fsync_folder(folder):
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_changed_files(folder, files) -> list:
     """
-    :param source: j2 template source path
-    :param destination: out file path
-    :param data: dictionary with fields for template
-    :return: Nothing
+    :param folder: destination folder
+    :param files: dictionary with file names and contents
+    :return: names of the files that were written
     """
-    template = None
-    with open(source) as template_file:
-        template = template_file.read()
-    processed_template = Environment().from_string(template).render(data)
-    with open(destination, "w") as f:
-        f.write(processed_template)
+    changed = []
+    for filename, content in files.items():
+        path = os.path.join(folder, filename)
+        if read_file(path) != content:
+            write_file_atomic(path, content)
+            changed.append(filename)
+    return changed
+
+
+def remove_stale_files(folder, keep, suffix) -> list:
+    """
+    :param folder: folder to clean up
+    :param keep: names of the files to keep
+    :param suffix: only files with this suffix are removed
+    :return: names of the removed files
+    """
+    stale = [
+        filename for filename in os.listdir(folder)
+        if filename.endswith(suffix) and filename not in keep
+    ]
+    for filename in stale:
+        os.remove(os.path.join(folder, filename))
+    if stale:
+        fsync_folder(folder)
+    return stale
 
 
 def init_default_logger():
@@ -69,23 +191,98 @@ def init_default_logger():
     logging.basicConfig(level=logging.DEBUG, handlers=handlers)
 
 
-def post_request(url, json, cookies=None):
+RETRY_STATUSES = (502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(
+    pool_hosts: int = HTTP_POOL_HOSTS,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    retries: int = HTTP_RETRIES,
+    backoff: float = HTTP_RETRY_BACKOFF
+) -> requests.Session:
+    """
+    Creates session that keeps up to pool_maxsize connections open for each of pool_hosts
+    most recently used hosts. Failed connects and gateway errors are retried with
+    exponential backoff. POST is retried too: the proxy sends only read-only JSON-RPC calls.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Returns session shared by all threads of the process"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def post_request(url, json, cookies=None, timeout=None):
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
     try:
-        return requests.post(
+        return get_session().post(
             url,
             json=json,
             cookies=cookies,
-            timeout=30
+            timeout=timeout
         )
     except requests.exceptions.RequestException:
         return None
 
 
-def make_rpc_call(http_endpoint, method, params=None):
-    params = params or []
-    resp = post_request(
-        http_endpoint,
-        json={"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
-    )
-    if resp and resp.status_code == 200:
-        return resp
+def make_batch_rpc_call(http_endpoint, calls: list):
+    """
+    Sends (method, params) pairs as one JSON-RPC batch request.
+    Returns responses in the order of calls (None for missing ones) or None if the request
+    failed and can be retried. Raises BatchRejected if the endpoint doesn't accept batches.
+    """
+    resp = post_request(http_endpoint, json=compose_batch_payload(calls))
+    if resp is None or resp.status_code == TOO_MANY_REQUESTS or resp.status_code >= 500:
+        return None
+    if resp.status_code != 200:
+        raise BatchRejected(f'HTTP {resp.status_code}')
+    try:
+        data = resp.json()
+    except ValueError:
+        return None
+    return parse_batch_response(data, len(calls))
+
+
+def compose_batch_payload(calls: list) -> list:
+    return [
+        {"jsonrpc": "2.0", "method": method, "params": params or [], "id": i}
+        for i, (method, params) in enumerate(calls)
+    ]
+
+
+def parse_batch_response(data, size: int) -> list:
+    """Orders batch responses by id, a reply that is not a list means batches are rejected"""
+    if not isinstance(data, list):
+        raise BatchRejected('response is not a list')
+    responses = [None] * size
+    for item in data:
+        index = item.get('id') if isinstance(item, dict) else None
+        if isinstance(index, int) and 0 <= index < size:
+            responses[index] = item
+    return responses
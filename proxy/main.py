@@ -17,41 +17,150 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import signal
 import logging
-from time import sleep
+from time import monotonic, sleep
 from pathlib import Path
 
-from proxy.nginx import update_nginx_configs
-from proxy.endpoints import generate_endpoints
-from proxy.helper import init_default_logger, write_json
+from proxy import monitoring, tracing
+from proxy.nginx import update_nginx_configs, reload_manager
+from proxy.endpoints import (
+    generate_endpoints, refresh_chains_info, poll_topology_changes, public_endpoints
+)
+from proxy.helper import init_default_logger, publish_json
 from proxy.heartbeat import send_heartbeat
+from proxy.registry_cache import RegistryCache
 from proxy.str_formatters import arguments_list_string
 from proxy.config import (
-    CHAINS_INFO_FILEPATH, MONITOR_INTERVAL, ENDPOINT, SM_ABI_FILEPATH,
-    TMP_CHAINS_FOLDER, TMP_UPSTREAMS_FOLDER, HEARTBEAT_URL
+    CHAINS_INFO_FILEPATH, MONITOR_INTERVAL, ENDPOINTS, SM_ABI_FILEPATH,
+    CHAINS_FOLDER, UPSTREAMS_FOLDER, HEARTBEAT_URL, HEALTH_CHECK_INTERVAL, METRICS_PORT,
+    PROFILE_CYCLE, REGISTRY_EVENT_UPDATES, DISCOVERY_RETRY_INTERVAL
 )
 
 
 logger = logging.getLogger(__name__)
 
+profile_next_cycle = PROFILE_CYCLE
+
 
 def main():
     init_default_logger()
     logger.info(arguments_list_string({
-        'Endpoint': ENDPOINT
+        'Endpoints': ENDPOINTS
         }, 'Starting SKALE Proxy server'))
 
-    Path(TMP_CHAINS_FOLDER).mkdir(parents=True, exist_ok=True)
-    Path(TMP_UPSTREAMS_FOLDER).mkdir(parents=True, exist_ok=True)
+    Path(CHAINS_FOLDER).mkdir(parents=True, exist_ok=True)
+    Path(UPSTREAMS_FOLDER).mkdir(parents=True, exist_ok=True)
+    if METRICS_PORT:
+        monitoring.start_metrics_server(METRICS_PORT)
+
+    registry_cache = RegistryCache()
+    registry_cache.load()
+    signal.signal(signal.SIGUSR1, request_profile)
 
+    proxy_loop = ProxyLoop(registry_cache)
     while True:
-        logger.info('Collecting endpoints list')
-        schains_endpoints = generate_endpoints(ENDPOINT, SM_ABI_FILEPATH)
-        write_json(CHAINS_INFO_FILEPATH, schains_endpoints)
-        update_nginx_configs(schains_endpoints)
+        proxy_loop.tick()
+        sleep(HEALTH_CHECK_INTERVAL)
+
+
+class ProxyLoop:
+    """
+    Schedules SKALE Manager scans, topology checks and health checks of the known endpoints.
+    Failed scans are retried with exponential backoff, health checks run in between.
+    """
+
+    def __init__(
+        self,
+        registry_cache: RegistryCache,
+        scan_interval: int = MONITOR_INTERVAL,
+        retry_interval: int = DISCOVERY_RETRY_INTERVAL
+    ):
+        self.registry_cache = registry_cache
+        self.scan_interval = scan_interval
+        self.retry_interval = retry_interval
+        self.schains_endpoints = None
+        self.next_scan_ts = monotonic()
+        self.failures = 0
+
+    def tick(self) -> None:
+        if monotonic() >= self.next_scan_ts:
+            logger.info('Collecting endpoints list')
+            self.scan(scheduled=True)
+        elif not self.failures and REGISTRY_EVENT_UPDATES and \
+                topology_changed(self.registry_cache):
+            logger.info('Topology changed, collecting endpoints list')
+            self.scan(scheduled=False)
+        elif self.schains_endpoints and refresh_health(self.schains_endpoints):
+            logger.info('Healthy endpoints changed, updating configs')
+            publish_endpoints(self.schains_endpoints)
+        else:
+            reload_manager.maybe_reload()
+
+    def scan(self, scheduled: bool) -> None:
+        collected = run_cycle(self.registry_cache, self.schains_endpoints)
+        if collected is None:
+            self.failures += 1
+            delay = min(self.retry_interval * 2 ** (self.failures - 1), self.scan_interval)
+            logger.warning(f'Scan failed {self.failures} times in a row, next one in {delay}s')
+            self.next_scan_ts = monotonic() + delay
+            return
+        self.schains_endpoints, self.failures = collected, 0
+        if scheduled:
+            self.next_scan_ts = monotonic() + self.scan_interval
+            logger.info(f'Proxy iteration done, next scan in {self.scan_interval}s...')
+
+
+def run_cycle(registry_cache: RegistryCache, previous_endpoints: list = None) -> list:
+    """
+    Collects and publishes endpoints of all sChains. Returns None if discovery failed,
+    in this case previously published endpoints and configs are kept as is.
+    """
+    global profile_next_cycle
+    profile_enabled, profile_next_cycle = profile_next_cycle, False
+    with tracing.profile('cycle', enabled=profile_enabled), \
+            monitoring.time_stage('cycle') as cycle_span:
+        try:
+            with monitoring.time_stage('discovery'):
+                schains_endpoints = generate_endpoints(
+                    ENDPOINTS, SM_ABI_FILEPATH, registry_cache, previous_endpoints)
+        except Exception:
+            logger.exception('Could not collect endpoints, keeping last known ones')
+            return None
+        cycle_span.set_attribute('chains', len(schains_endpoints))
+        cycle_span.set_attribute('stale', sum(bool(e.get('stale')) for e in schains_endpoints))
+        publish_endpoints(schains_endpoints)
         send_heartbeat(HEARTBEAT_URL)
-        logger.info(f'Proxy iteration done, sleeping for {MONITOR_INTERVAL}s...')
-        sleep(MONITOR_INTERVAL)
+    return schains_endpoints
+
+
+def topology_changed(registry_cache: RegistryCache) -> bool:
+    try:
+        return poll_topology_changes(ENDPOINTS, SM_ABI_FILEPATH, registry_cache)
+    except Exception:
+        logger.exception('Could not check SKALE Manager events')
+        return False
+
+
+def request_profile(signum, frame) -> None:
+    """SIGUSR1 handler, profiles the next full cycle"""
+    global profile_next_cycle
+    logger.info('Next cycle will be profiled')
+    profile_next_cycle = True
+
+
+def refresh_health(schains_endpoints: list) -> bool:
+    with monitoring.time_stage('health_check'):
+        changed = refresh_chains_info(schains_endpoints)
+    monitoring.set_chains_health(schains_endpoints)
+    return changed
+
+
+def publish_endpoints(schains_endpoints: list) -> None:
+    with monitoring.time_stage('publish'):
+        publish_json(CHAINS_INFO_FILEPATH, public_endpoints(schains_endpoints))
+    monitoring.set_chains_health(schains_endpoints)
+    update_nginx_configs(schains_endpoints)
 
 
 if __name__ == '__main__':
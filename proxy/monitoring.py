@@ -0,0 +1,117 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+from contextlib import contextmanager
+from time import monotonic
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+from proxy import tracing
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+registry = CollectorRegistry()
+stage_duration = Histogram(
+    'proxy_stage_duration_seconds', 'Duration of control loop stages',
+    ['stage'], buckets=STAGE_BUCKETS, registry=registry
+)
+stage_failures = Counter(
+    'proxy_stage_failures', 'Number of control loop stages that raised an exception',
+    ['stage'], registry=registry
+)
+chain_discovery_duration = Histogram(
+    'proxy_chain_discovery_duration_seconds', 'Time to read sChain topology from contracts',
+    buckets=STAGE_BUCKETS, registry=registry
+)
+dropped_nodes = Counter(
+    'proxy_dropped_nodes', 'Number of nodes excluded from upstreams',
+    ['reason'], registry=registry
+)
+nginx_reloads = Counter(
+    'proxy_nginx_reloads', 'Number of nginx reload attempts by result',
+    ['result'], registry=registry
+)
+chain_healthy_endpoints = Gauge(
+    'proxy_chain_healthy_endpoints', 'Number of healthy endpoints of the sChain',
+    ['chain'], registry=registry
+)
+chain_nodes = Gauge(
+    'proxy_chain_nodes', 'Number of nodes in the sChain group',
+    ['chain'], registry=registry
+)
+chain_last_discovery_duration = Gauge(
+    'proxy_chain_last_discovery_duration_seconds',
+    'Time of the last successful topology read of the sChain',
+    ['chain'], registry=registry
+)
+
+_discovered_chains = set()
+
+
+def start_metrics_server(port: int) -> None:
+    """Serves /metrics on the given port"""
+    start_http_server(port, registry=registry)
+    logger.info(f'Serving metrics on :{port}/metrics')
+
+
+@contextmanager
+def time_stage(stage: str, **attributes):
+    """Records stage duration to metrics and as a tracing span"""
+    start = monotonic()
+    try:
+        with tracing.span(stage, **attributes) as stage_span:
+            yield stage_span
+    except Exception:
+        stage_failures.labels(stage).inc()
+        raise
+    finally:
+        stage_duration.labels(stage).observe(monotonic() - start)
+
+
+def observe_chain_discovery(schain_name: str, elapsed: float) -> None:
+    chain_discovery_duration.observe(elapsed)
+    chain_last_discovery_duration.labels(schain_name).set(elapsed)
+    _discovered_chains.add(schain_name)
+
+
+def record_dropped_node(reason: str) -> None:
+    dropped_nodes.labels(reason).inc()
+
+
+def record_nginx_reload(result: str) -> None:
+    nginx_reloads.labels(result).inc()
+
+
+def set_chains_health(schains_endpoints: list) -> None:
+    """Replaces per-chain gauges, so removed sChains are not reported anymore"""
+    chain_healthy_endpoints.clear()
+    chain_nodes.clear()
+    names = {e['chain_info']['schain_name'] for e in schains_endpoints}
+    for schain_name in _discovered_chains - names:
+        chain_last_discovery_duration.remove(schain_name)
+        _discovered_chains.discard(schain_name)
+    for schain_endpoints in schains_endpoints:
+        chain_info = schain_endpoints['chain_info']
+        chain_healthy_endpoints.labels(chain_info['schain_name']).set(
+            len(chain_info['http_endpoints']))
+        chain_nodes.labels(chain_info['schain_name']).set(len(schain_endpoints['nodes']))
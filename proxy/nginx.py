@@ -18,82 +18,201 @@
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-import shutil
 import logging
-from pathlib import Path
+import threading
 
 import docker
 
-from proxy.helper import process_template
+from proxy import monitoring, tracing
+from proxy.balancing import balancing_directive, supports_backup
+from proxy.chain_settings import load_chain_overrides, get_chain_settings
+from proxy.helper import read_file, template_renderer
+from proxy.nginx_reload import NginxReloadManager, CONFIG_SUFFIX
+from proxy.rpc_cache import (
+    CHECKED_CLASSES, UNCACHEABLE, block_digits, cache_ttls, nginx_cache_buckets,
+    nginx_class_patterns
+)
 from proxy.config import (
-    SCHAIN_NGINX_TEMPLATE, UPSTREAM_NGINX_TEMPLATE, CHAINS_FOLDER, UPSTREAMS_FOLDER,
-    NGINX_CONTAINER_NAME, CONTAINER_RUNNING_STATUS, TMP_CHAINS_FOLDER, TMP_UPSTREAMS_FOLDER
+    SCHAIN_NGINX_TEMPLATE, UPSTREAM_NGINX_TEMPLATE, RPC_CACHE_NGINX_TEMPLATE, CHAINS_FOLDER,
+    UPSTREAMS_FOLDER, STAGING_FOLDER, NGINX_CONTAINER_NAME, NGINX_RELOAD_METHOD, RPC_CACHE_PATH,
+    RPC_CACHE_CHECK_PORT
 )
 
 
 logger = logging.getLogger(__name__)
-docker_client = docker.DockerClient()
 
+MIN_UPSTREAM_WEIGHT = 1
+# Shared http-level config, SKALE chain names can't contain underscores
+RPC_CACHE_CONFIG = f'_rpc_cache{CONFIG_SUFFIX}'
 
-def update_nginx_configs(schains_endpoints: list) -> None:
-    generate_nginx_configs(schains_endpoints)
-    move_nginx_configs()
-    monitor_nginx_container()
-
-
-def move_nginx_configs():
-    """Moves nginx configs from the temporary directories to the main folders"""
-    logger.info('Moving nginx configs from temporary directories...')
-    shutil.rmtree(CHAINS_FOLDER, ignore_errors=True)
-    shutil.rmtree(UPSTREAMS_FOLDER, ignore_errors=True)
-    shutil.move(TMP_CHAINS_FOLDER, CHAINS_FOLDER)
-    shutil.move(TMP_UPSTREAMS_FOLDER, UPSTREAMS_FOLDER)
-    Path(TMP_CHAINS_FOLDER).mkdir(parents=True, exist_ok=True)
-    Path(TMP_UPSTREAMS_FOLDER).mkdir(parents=True, exist_ok=True)
-    logger.info('nginx configs moved')
-
-
-def monitor_nginx_container(d_client=None):
-    logger.info('Going to restart nginx container')
-    d_client = d_client or docker_client
-    nginx_container = d_client.containers.get(NGINX_CONTAINER_NAME)
-
-    if is_container_running(nginx_container):
-        reload_nginx(nginx_container)
-    else:
-        logger.info('nginx container is not running, trying to restart')
-        nginx_container.restart()
 
+class NginxContainerHandle:
+    """
+    Creates Docker client on first use and caches nginx container handle between cycles.
+    Container state is refreshed only on request, after a Docker API call on it failed.
+    """
 
-def reload_nginx(container) -> int:
-    res = container.exec_run(cmd='nginx -s reload')
-    if res != 0:
-        logger.warning('Could not reload nginx configuration, check out nginx logs')
-    else:
-        logger.info('Successfully reloaded nginx service')
-    return res
+    def __init__(self, container_name: str = NGINX_CONTAINER_NAME, d_client=None):
+        self.container_name = container_name
+        self._client = d_client
+        self._container = None
+        self._lock = threading.Lock()
 
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = docker.DockerClient()
+        return self._client
 
-def is_container_running(container) -> bool:
-    return container.status == CONTAINER_RUNNING_STATUS
+    def get(self, refresh: bool = False):
+        with self._lock:
+            if self._container is None:
+                self._container = self.client.containers.get(self.container_name)
+            elif refresh:
+                try:
+                    self._container.reload()
+                except docker.errors.NotFound:
+                    logger.info(f'{self.container_name} container was recreated, refreshing handle')
+                    self._container = self.client.containers.get(self.container_name)
+            return self._container
 
 
-def generate_nginx_configs(schains_endpoints: list) -> None:
-    logger.info('Generating nginx configs...')
-    for schain_endpoints in schains_endpoints:
-        if not schain_endpoints:
-            continue
-        logger.info(f'Processing template for {schain_endpoints["chain_info"]["schain_name"]}...')
-        process_nginx_config_template(schain_endpoints['chain_info'])
+nginx_container = NginxContainerHandle()
+
 
+def get_nginx_container(refresh: bool = False):
+    return nginx_container.get(refresh)
 
-def process_nginx_config_template(chain_info: dict) -> None:
-    chain_dest = os.path.join(TMP_CHAINS_FOLDER, f'{chain_info["schain_name"]}.conf')
-    upstream_dest = os.path.join(TMP_UPSTREAMS_FOLDER, f'{chain_info["schain_name"]}.conf')
-    process_template(SCHAIN_NGINX_TEMPLATE, chain_dest, chain_info)
-    process_template(UPSTREAM_NGINX_TEMPLATE, upstream_dest, chain_info)
+
+reload_manager = NginxReloadManager(
+    get_container=get_nginx_container,
+    staging_folder=STAGING_FOLDER,
+    reload_method=NGINX_RELOAD_METHOD
+)
+
+
+def update_nginx_configs(schains_endpoints: list) -> None:
+    if generate_nginx_configs(schains_endpoints):
+        reload_manager.request_reload()
+    else:
+        logger.info('nginx configs are unchanged')
+    reload_manager.maybe_reload()
+
+
+def generate_nginx_configs(schains_endpoints: list) -> bool:
+    """
+    Renders nginx configs for all sChains and stages them for validation.
+    Upstreams are written before the chain configs that use them and removed after them.
+    Returns True if the staged configs differ from the live ones.
+    """
+    logger.info('Generating nginx configs...')
+    with monitoring.time_stage('render', chains=len(schains_endpoints)):
+        chain_configs, upstream_configs = render_nginx_configs(schains_endpoints)
+    with tracing.span('stage_configs') as stage_span:
+        changed = reload_manager.stage({
+            UPSTREAMS_FOLDER: upstream_configs,
+            CHAINS_FOLDER: chain_configs
+        })
+        stage_span.set_attribute('changed', changed)
+    return changed
+
+
+def render_nginx_configs(schains_endpoints: list) -> tuple:
+    chains_info = [e['chain_info'] for e in schains_endpoints if e]
+    filenames = [f'{chain_info["schain_name"]}{CONFIG_SUFFIX}' for chain_info in chains_info]
+    overrides = load_chain_overrides()
+    contexts = [compose_template_context(chain_info, overrides) for chain_info in chains_info]
+    chain_configs = template_renderer.render_many(SCHAIN_NGINX_TEMPLATE, contexts)
+    upstream_configs = dict(zip(
+        filenames, template_renderer.render_many(UPSTREAM_NGINX_TEMPLATE, contexts)))
+    cached_chains = [
+        (context['schain_name'], context['rpc_cache']['block_digits'])
+        for context in contexts if context['rpc_cache']
+    ]
+    upstream_configs[RPC_CACHE_CONFIG] = template_renderer.render(RPC_CACHE_NGINX_TEMPLATE, {
+        'chains': cached_chains,
+        'patterns': nginx_class_patterns([digits for _, digits in cached_chains]),
+        'buckets': nginx_cache_buckets(),
+        'uncacheable': UNCACHEABLE,
+        'check_port': RPC_CACHE_CHECK_PORT
+    })
+    chain_configs = dict(zip(filenames, chain_configs))
+    for filename, context in zip(filenames, contexts):
+        if not has_servers(context):
+            keep_live_configs(filename, chain_configs, upstream_configs)
+    return chain_configs, upstream_configs
+
+
+def has_servers(context: dict) -> bool:
+    """nginx rejects upstreams without servers, so such chains can't be rendered"""
+    return all(
+        context[upstream]['servers'] for upstream in ('http_upstream', 'ws_upstream', 'fs_upstream')
+    )
+
+
+def keep_live_configs(filename: str, chain_configs: dict, upstream_configs: dict) -> None:
+    """Replaces configs of a chain without healthy nodes with the live ones, if there are any"""
+    chain_config = read_file(os.path.join(CHAINS_FOLDER, filename))
+    upstream_config = read_file(os.path.join(UPSTREAMS_FOLDER, filename))
+    if chain_config is None or upstream_config is None:
+        logger.warning(f'{filename}: no healthy nodes and no live config, skipping the chain')
+        del chain_configs[filename], upstream_configs[filename]
+        return
+    logger.warning(f'{filename}: no healthy nodes, keeping the live config')
+    chain_configs[filename], upstream_configs[filename] = chain_config, upstream_config
+
+
+def compose_template_context(chain_info: dict, overrides: dict) -> dict:
+    settings = get_chain_settings(chain_info, overrides)
+    return {
+        **chain_info,
+        'settings': settings,
+        'http_upstream': compose_upstream(chain_info, 'http', settings['http_balancing']),
+        'ws_upstream': compose_upstream(chain_info, 'ws', settings['ws_balancing']),
+        'fs_upstream': compose_upstream(chain_info, 'fs', settings['fs_balancing']),
+        'rpc_cache': compose_rpc_cache(chain_info, settings)
+    }
+
+
+def compose_rpc_cache(chain_info: dict, settings: dict):
+    """Returns JSON-RPC cache zone parameters of the chain or None if caching is disabled"""
+    ttl = max(cache_ttls().values())
+    if not settings['rpc_cache'] or ttl <= 0:
+        return None
+    return {
+        'zone': f'rpc-{chain_info["schain_name"]}',
+        'path': f'{RPC_CACHE_PATH}/rpc-{chain_info["schain_name"]}',
+        'max_size': settings['rpc_cache_max_size'],
+        'keys_zone_size': settings['rpc_cache_keys_zone_size'],
+        'block_digits': block_digits(chain_info.get('block_number', -1)),
+        'upstream_var': f'rpc_cache_upstream_{chain_info["schain_name"].replace("-", "_")}',
+        'checked_classes': CHECKED_CLASSES,
+        'ttl': ttl
+    }
+
+
+def compose_upstream(chain_info: dict, endpoint_type: str, strategy: str) -> dict:
+    """
+    Combines endpoints with their weights. Strategies that don't allow backup servers
+    (ip_hash, hash, random) get endpoints scored as backup with the minimal weight instead.
+    Resolved IP addresses are used when available, the domain is kept as a comment.
+    """
+    backup_supported = supports_backup(strategy)
+    endpoints = chain_info[f'{endpoint_type}_endpoints']
+    addresses = chain_info.get(f'{endpoint_type}_addresses') or endpoints
+    servers = []
+    for index, (endpoint, address) in enumerate(zip(endpoints, addresses)):
+        backup = chain_info['backup'][index]
+        weight = chain_info['weights'][index]
+        servers.append({
+            'address': address,
+            'domain': endpoint if endpoint != address else None,
+            'weight': MIN_UPSTREAM_WEIGHT if backup and not backup_supported else weight,
+            'backup': backup and backup_supported
+        })
+    return {'balancing': balancing_directive(strategy), 'servers': servers}
 
 
 if __name__ == '__main__':
-    res = generate_nginx_configs([])
+    res = render_nginx_configs([])
     print(res)
@@ -0,0 +1,216 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import logging
+from time import monotonic
+
+import docker
+
+from proxy import monitoring, tracing
+from proxy.helper import read_file, write_changed_files, remove_stale_files
+from proxy.config import (
+    CONTAINER_RUNNING_STATUS, NGINX_RELOAD_MIN_INTERVAL, NGINX_RELOAD_METHOD, NGINX_CONF_FOLDER
+)
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SUFFIX = '.conf'
+EXEC_RELOAD = 'exec'
+SIGNAL_RELOAD = 'signal'
+NGINX_MAIN_CONFIG = '/etc/nginx/nginx.conf'
+# Relative includes of nginx.conf are resolved from the folder of the tested file
+NGINX_STAGED_MAIN_CONFIG = '/etc/nginx/nginx.staged.conf'
+
+
+class NginxReloadManager:
+    """
+    Validates and reloads nginx configuration. New configs are written to a staging folder
+    and checked with `nginx -t` against a copy of nginx.conf that includes the staged files.
+    Live config folders are replaced only by a tree that passed the check, so nginx never
+    starts or reloads with unvalidated configs. Reload requests are coalesced, so nginx is
+    reloaded at most once per min_interval.
+    Reload is done either by `nginx -s reload` in the container (exec) or by sending SIGHUP
+    to the nginx master process, which is PID 1 of the container (signal).
+    get_container(refresh=False) returns the cached container, its state is refreshed
+    (refresh=True) only after a Docker API call on it failed.
+    """
+
+    def __init__(
+        self,
+        get_container,
+        staging_folder: str,
+        min_interval: int = NGINX_RELOAD_MIN_INTERVAL,
+        reload_method: str = NGINX_RELOAD_METHOD,
+        nginx_conf_folder: str = NGINX_CONF_FOLDER
+    ):
+        if reload_method not in (EXEC_RELOAD, SIGNAL_RELOAD):
+            raise ValueError(f'Unknown nginx reload method: {reload_method}')
+        self.get_container = get_container
+        self.staging_folder = staging_folder
+        self.min_interval = min_interval
+        self.reload_method = reload_method
+        self.nginx_conf_folder = nginx_conf_folder
+        self.pending = False
+        self.reloads = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_reload_latency = None
+        self._last_reload_ts = None
+        self._live_folders = []
+
+    def stage(self, trees: dict) -> bool:
+        """
+        Writes config trees ({live folder: {filename: content}}) to the staging folder.
+        Folders are promoted in the given order and cleaned up in the reverse one.
+        Returns True if the staged configs differ from the live ones.
+        """
+        self._live_folders = list(trees)
+        for folder, files in trees.items():
+            staged_folder = self.staged_folder(folder)
+            os.makedirs(staged_folder, exist_ok=True)
+            write_changed_files(staged_folder, files)
+            remove_stale_files(staged_folder, keep=files, suffix=CONFIG_SUFFIX)
+        return read_config_tree(self._live_folders) != trees
+
+    def staged_folder(self, folder: str) -> str:
+        return os.path.join(self.staging_folder, os.path.basename(folder))
+
+    def request_reload(self) -> None:
+        self.pending = True
+
+    def maybe_reload(self) -> bool:
+        """Performs pending reload if min_interval has passed since the previous one"""
+        if not self.pending:
+            return False
+        if self._last_reload_ts is not None and \
+                monotonic() - self._last_reload_ts < self.min_interval:
+            logger.info('nginx was reloaded recently, postponing reload')
+            return False
+        self.pending = False
+        self._last_reload_ts = monotonic()
+        with monitoring.time_stage('reload'):
+            return self._reload()
+
+    def stats(self) -> dict:
+        return {
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'last_reload_latency': self.last_reload_latency
+        }
+
+    def _reload(self) -> bool:
+        try:
+            return self._validate_and_reload(self.get_container())
+        except docker.errors.APIError as e:
+            logger.warning(f'nginx container call failed: {e}, refreshing container state')
+            self.failures += 1
+            monitoring.record_nginx_reload('failure')
+        container = self.get_container(refresh=True)
+        if not is_container_running(container):
+            logger.info('nginx container is not running, restarting it with the live configs')
+            container.restart()
+            monitoring.record_nginx_reload('restart')
+        self.pending = True
+        return False
+
+    def _validate_and_reload(self, container) -> bool:
+        start = monotonic()
+        with tracing.span('validate_config'):
+            config_ok = validate_nginx_config(container, self._staged_config_command())
+        if not config_ok:
+            logger.error('Staged nginx configs are invalid, keeping the live ones')
+            self.failures += 1
+            self.rejected += 1
+            monitoring.record_nginx_reload('rejected')
+            return False
+        self._promote()
+        with tracing.span('reload_nginx', method=self.reload_method):
+            if self.reload_method == SIGNAL_RELOAD:
+                exit_code = signal_nginx_reload(container)
+            else:
+                exit_code = reload_nginx(container)
+        if exit_code != 0:
+            self.failures += 1
+            monitoring.record_nginx_reload('failure')
+            return False
+        self.reloads += 1
+        monitoring.record_nginx_reload('success')
+        self.last_reload_latency = monotonic() - start
+        logger.info(f'nginx reload stats: {self.stats()}')
+        return True
+
+    def _promote(self) -> None:
+        """Replaces live configs with the validated staged ones"""
+        staged = read_config_tree([self.staged_folder(f) for f in self._live_folders])
+        trees = {folder: staged[self.staged_folder(folder)] for folder in self._live_folders}
+        written, removed = [], []
+        for folder, files in trees.items():
+            written += write_changed_files(folder, files)
+        for folder, files in reversed(trees.items()):
+            removed += remove_stale_files(folder, keep=files, suffix=CONFIG_SUFFIX)
+        logger.info(f'nginx configs: {len(written)} written, {len(removed)} removed')
+
+    def _staged_config_command(self) -> list:
+        """Tests nginx.conf with includes from the live config folders pointed to staging"""
+        staged_conf_folder = os.path.join(
+            self.nginx_conf_folder, os.path.basename(self.staging_folder))
+        return ['sh', '-c', (
+            f"sed 's#{self.nginx_conf_folder}/#{staged_conf_folder}/#g' {NGINX_MAIN_CONFIG} "
+            f"> {NGINX_STAGED_MAIN_CONFIG} && nginx -t -c {NGINX_STAGED_MAIN_CONFIG}"
+        )]
+
+
+def read_config_tree(folders: list) -> dict:
+    return {
+        folder: {
+            filename: read_file(os.path.join(folder, filename))
+            for filename in os.listdir(folder) if filename.endswith(CONFIG_SUFFIX)
+        }
+        for folder in folders
+    }
+
+
+def validate_nginx_config(container, cmd='nginx -t') -> bool:
+    res = container.exec_run(cmd=cmd)
+    if res.exit_code != 0:
+        logger.error(f'nginx config validation failed: {res.output}')
+        return False
+    return True
+
+
+def reload_nginx(container) -> int:
+    res = container.exec_run(cmd='nginx -s reload')
+    if res.exit_code != 0:
+        logger.warning('Could not reload nginx configuration, check out nginx logs')
+    else:
+        logger.info('Successfully reloaded nginx service')
+    return res.exit_code
+
+
+def signal_nginx_reload(container) -> int:
+    container.kill(signal='SIGHUP')
+    logger.info('Sent SIGHUP to nginx master process')
+    return 0
+
+
+def is_container_running(container) -> bool:
+    return container.status == CONTAINER_RUNNING_STATUS
@@ -17,30 +17,136 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import threading
+
 from web3.contract import Contract
 
+from proxy.call_batch import CallBatch
 from proxy.skaled_ports import SkaledPorts
 from proxy.config import PORTS_PER_SCHAIN
 from proxy.helper import ip_from_bytes
 
+NODE_INFO_CALLS = 3
+
+
+class NodeInfoCache:
+    """
+    Per-cycle cache of node records keyed by node_id. Most nodes host several sChains,
+    so each record is read from the contracts once and shared between all of them.
+    Thread-safe: a node that is being read by one worker is awaited by the others.
+    """
+
+    def __init__(self, records: dict = None):
+        self.hits = 0
+        self.misses = 0
+        self._records = dict(records or {})
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, node_ids: list, fetch) -> dict:
+        to_fetch, to_wait = [], []
+        with self._lock:
+            for node_id in node_ids:
+                if node_id in self._records:
+                    self.hits += 1
+                elif node_id in self._pending:
+                    self.hits += 1
+                    to_wait.append(self._pending[node_id])
+                else:
+                    self.misses += 1
+                    self._pending[node_id] = threading.Event()
+                    to_fetch.append(node_id)
+        if to_fetch:
+            try:
+                records = fetch(to_fetch)
+                with self._lock:
+                    self._records.update(records)
+            finally:
+                with self._lock:
+                    for node_id in to_fetch:
+                        self._pending.pop(node_id).set()
+        for event in to_wait:
+            event.wait()
+        missing = [node_id for node_id in node_ids if node_id not in self._records]
+        records = fetch(missing) if missing else {}
+        records.update({
+            node_id: self._records[node_id]
+            for node_id in node_ids if node_id in self._records
+        })
+        return records
+
+    def records(self) -> dict:
+        with self._lock:
+            return dict(self._records)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'nodes': len(self._records)}
+
 
 def get_node_info(
     schain_hash: str,
     node_id: int,
     nodes_contract: Contract,
+    schains_internal_contract: Contract,
+    node_cache: NodeInfoCache = None
+) -> dict:
+    return get_nodes_info(
+        schain_hash, [node_id], nodes_contract, schains_internal_contract, node_cache)[0]
+
+
+def get_nodes_info(
+    schain_hash: str,
+    node_ids: list,
+    nodes_contract: Contract,
+    schains_internal_contract: Contract,
+    node_cache: NodeInfoCache = None
+) -> list:
+    """Returns info for all given nodes, node records are taken from node_cache if provided"""
+    def fetch(ids):
+        return read_node_records(ids, nodes_contract, schains_internal_contract)
+
+    if node_cache is None:
+        records = fetch(node_ids)
+    else:
+        records = node_cache.resolve(node_ids, fetch)
+    return [_format_node_info(schain_hash, node_id, records[node_id]) for node_id in node_ids]
+
+
+def read_node_records(
+    node_ids: list,
+    nodes_contract: Contract,
     schains_internal_contract: Contract
 ) -> dict:
-    node = nodes_contract.functions.nodes(node_id).call()
+    """Reads raw node records using a single batch of contract calls"""
+    batch = CallBatch()
+    for node_id in node_ids:
+        batch.add(nodes_contract.functions.nodes(node_id))
+        batch.add(nodes_contract.functions.getNodeDomainName(node_id))
+        batch.add(schains_internal_contract.functions.getSchainHashesForNode(node_id))
+    results = batch.execute()
+    records = {}
+    for index, node_id in enumerate(node_ids):
+        node, domain, schain_hashes = results[index * NODE_INFO_CALLS:(index + 1) * NODE_INFO_CALLS]
+        records[node_id] = {
+            'name': node[0],
+            'ip': ip_from_bytes(node[1]),
+            'base_port': node[3],
+            'domain': domain,
+            'schain_hashes': schain_hashes
+        }
+    return records
+
+
+def _format_node_info(schain_hash, node_id, record) -> dict:
     node_dict = {
         'id': node_id,
-        'name': node[0],
-        'ip': ip_from_bytes(node[1]),
-        'base_port': node[3],
-        'domain': nodes_contract.functions.getNodeDomainName(node_id).call()
+        'name': record['name'],
+        'ip': record['ip'],
+        'base_port': record['base_port'],
+        'domain': record['domain']
     }
-    schain_hashes = schains_internal_contract.functions.getSchainHashesForNode(node_id).call()
     node_dict['schain_base_port'] = _get_schain_base_port_on_node(
-        schain_hash, schain_hashes, node_dict['base_port']
+        schain_hash, record['schain_hashes'], node_dict['base_port']
     )
     node_dict.update(_calc_ports(node_dict['schain_base_port']))
     return node_dict
@@ -0,0 +1,136 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from proxy import tracing
+from proxy.helper import create_session
+from proxy.config import PROBE_CONCURRENCY, PROBE_POOL_HOSTS, PROBE_TIMEOUT, SYNC_INFO_METHOD
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_session = None
+_lock = threading.Lock()
+
+
+@dataclass
+class ProbeResult:
+    alive: bool
+    block_ts: int = -1
+    block_number: int = -1
+    rtt: float = None
+    syncing: bool = False
+    info_block_number: int = None
+
+
+def probe_node(http_endpoint: str, info_endpoint: str = None) -> ProbeResult:
+    """
+    Checks node availability, reads its latest block and eth_syncing status using one
+    JSON-RPC batch request. Node is considered alive if it returns any HTTP response.
+    If info_endpoint is given, latest block number is read from skaled info port too.
+    """
+    start = monotonic()
+    try:
+        res = _get_session().post(
+            http_endpoint,
+            json=[
+                {
+                    'jsonrpc': '2.0',
+                    'method': 'eth_getBlockByNumber',
+                    'params': ['latest', False],
+                    'id': 1
+                },
+                {'jsonrpc': '2.0', 'method': 'eth_syncing', 'params': [], 'id': 2}
+            ],
+            timeout=PROBE_TIMEOUT
+        )
+    except requests.exceptions.RequestException:
+        return ProbeResult(alive=False)
+    result = ProbeResult(alive=True, rtt=monotonic() - start)
+    responses = _parse_batch(res)
+    try:
+        block = responses[1]['result']
+        result.block_ts = int(block['timestamp'], 16)
+        result.block_number = int(block['number'], 16)
+    except (KeyError, TypeError, ValueError):
+        logger.debug(f'Could not get latest block from {http_endpoint}')
+    result.syncing = bool(responses.get(2, {}).get('result'))
+    if info_endpoint:
+        result.info_block_number = probe_info_port(info_endpoint)
+    return result
+
+
+def probe_info_port(info_endpoint: str) -> int:
+    """Returns block number reported by skaled info port or -1 if it can't be read"""
+    try:
+        res = _get_session().post(
+            info_endpoint,
+            json={'jsonrpc': '2.0', 'method': SYNC_INFO_METHOD, 'params': [], 'id': 1},
+            timeout=PROBE_TIMEOUT
+        )
+        return int(res.json()['result'], 16)
+    except (requests.exceptions.RequestException, KeyError, ValueError, TypeError):
+        logger.debug(f'Could not get block number from info port {info_endpoint}')
+        return -1
+
+
+def probe_nodes(http_endpoints: list, info_endpoints: list = None) -> list:
+    """Probes all endpoints concurrently, number of requests in flight is capped globally"""
+    info_endpoints = info_endpoints or [None] * len(http_endpoints)
+    return list(_get_executor().map(tracing.profiled(probe_node), http_endpoints, info_endpoints))
+
+
+def _parse_batch(res) -> dict:
+    """Maps batch responses by id, a single response to a batch is returned as the block one"""
+    try:
+        data = res.json()
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        return {1: data}
+    if not isinstance(data, list):
+        return {}
+    return {item.get('id'): item for item in data if isinstance(item, dict)}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PROBE_CONCURRENCY,
+                thread_name_prefix='probe'
+            )
+        return _executor
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session(pool_hosts=PROBE_POOL_HOSTS, pool_maxsize=4, retries=0)
+        return _session
@@ -0,0 +1,130 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+from time import time
+
+from proxy.helper import read_json, write_json
+from proxy.config import REGISTRY_CACHE_FILEPATH, REGISTRY_FULL_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryCache:
+    """
+    On-disk snapshot of the SKALE Manager topology (sChains, their node groups and node records)
+    tagged with the ETH block number it was read at. sChains listed in unresolved couldn't
+    be discovered at that block and are re-read from contracts on the next scan.
+    """
+
+    def __init__(self, filepath: str = REGISTRY_CACHE_FILEPATH):
+        self.filepath = filepath
+        self.block_number = None
+        self.full_refresh_ts = 0
+        self.schains = {}
+        self.nodes = {}
+        self.unresolved = set()
+
+    @property
+    def is_empty(self) -> bool:
+        return self.block_number is None
+
+    def needs_full_refresh(self) -> bool:
+        return self.is_empty or time() - self.full_refresh_ts > REGISTRY_FULL_REFRESH_INTERVAL
+
+    def update(
+        self,
+        block_number: int,
+        schains: dict,
+        nodes: dict,
+        full_refresh: bool,
+        unresolved: list = ()
+    ) -> None:
+        self.block_number = block_number
+        self.schains = schains
+        self.nodes = nodes
+        self.unresolved = set(unresolved)
+        if full_refresh:
+            self.full_refresh_ts = time()
+
+    def load(self) -> bool:
+        try:
+            self._from_dict(read_json(self.filepath))
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f'Could not load registry cache from {self.filepath}: {e}')
+            self.__init__(self.filepath)
+            return False
+        logger.info(f'Registry cache loaded: {len(self.schains)} sChains, \
+{len(self.nodes)} nodes, block {self.block_number}')
+        return True
+
+    def save(self) -> None:
+        write_json(self.filepath, self._to_dict())
+
+    def _to_dict(self) -> dict:
+        return {
+            'block_number': self.block_number,
+            'full_refresh_ts': self.full_refresh_ts,
+            'schains': [
+                {
+                    'hash': _hash_to_str(schain_hash),
+                    'schain': schain['schain'],
+                    'node_ids': schain['node_ids']
+                }
+                for schain_hash, schain in self.schains.items()
+            ],
+            'nodes': {
+                str(node_id): {
+                    **record,
+                    'schain_hashes': [_hash_to_str(h) for h in record['schain_hashes']]
+                }
+                for node_id, record in self.nodes.items()
+            },
+            'unresolved': [_hash_to_str(h) for h in self.unresolved]
+        }
+
+    def _from_dict(self, data: dict) -> None:
+        self.block_number = data['block_number']
+        self.full_refresh_ts = data['full_refresh_ts']
+        self.schains = {
+            _str_to_hash(schain['hash']): {
+                'schain': schain['schain'],
+                'node_ids': schain['node_ids']
+            }
+            for schain in data['schains']
+        }
+        self.nodes = {
+            int(node_id): {
+                **record,
+                'schain_hashes': [_str_to_hash(h) for h in record['schain_hashes']]
+            }
+            for node_id, record in data['nodes'].items()
+        }
+        self.unresolved = {_str_to_hash(h) for h in data.get('unresolved', [])}
+
+
+def _hash_to_str(schain_hash: bytes) -> str:
+    return bytes(schain_hash).hex()
+
+
+def _str_to_hash(schain_hash: str) -> bytes:
+    return bytes.fromhex(schain_hash)
@@ -0,0 +1,112 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import logging
+
+from web3 import Web3
+
+from proxy.helper import read_json, create_session
+from proxy.eth_failover import EndpointPool, FailoverHTTPProvider
+from proxy.request_timings import RequestTimings, eth_request_timings
+from proxy.config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_MAXSIZE, ETH_HEDGE_DELAY,
+    ETH_FAILOVER_MAX_COOLDOWN, DISCOVERY_CONCURRENCY
+)
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+
+
+class RegistryClient:
+    """
+    Long-lived connection to SKALE Manager contracts. Requests go to the fastest healthy
+    endpoint out of the given ones over pooled HTTP connections. Parsed ABI and contract
+    objects are reused until the ABI file changes.
+    """
+
+    def __init__(self, endpoints: list, abi_filepath: str, timings: RequestTimings = None):
+        self.endpoints = endpoints
+        self.abi_filepath = abi_filepath
+        self.timings = timings or eth_request_timings
+        # discovery workers and the main loop
+        concurrency = DISCOVERY_CONCURRENCY + 1
+        self.pool = EndpointPool(
+            endpoints,
+            hedge_delay=ETH_HEDGE_DELAY,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            max_cooldown=ETH_FAILOVER_MAX_COOLDOWN,
+            session=create_session(pool_hosts=len(endpoints),
+                                   pool_maxsize=max(HTTP_POOL_MAXSIZE, concurrency), retries=0),
+            concurrency=concurrency
+        )
+        self.web3 = Web3(FailoverHTTPProvider(self.pool))
+        self.web3.middleware_onion.add(
+            request_timing_middleware(self.timings), name='request_timing')
+        self._abi_mtime = None
+        self._contracts = None
+        self.abi_loads = 0
+
+    @property
+    def block_number(self) -> int:
+        return self.web3.eth.block_number
+
+    def contracts(self) -> tuple:
+        """Returns (schains_internal, schains, nodes) contracts, reloading ABI if it changed"""
+        mtime = os.stat(self.abi_filepath).st_mtime_ns
+        if self._contracts is None or mtime != self._abi_mtime:
+            self._contracts = init_contracts(self.web3, read_json(self.abi_filepath))
+            self._abi_mtime = mtime
+            self.abi_loads += 1
+            logger.info(f'Loaded SKALE Manager ABI from {self.abi_filepath}')
+        return self._contracts
+
+
+def get_registry_client(endpoints: list, abi_filepath: str) -> RegistryClient:
+    key = (tuple(endpoints), abi_filepath)
+    if key not in _clients:
+        _clients[key] = RegistryClient(endpoints, abi_filepath)
+    return _clients[key]
+
+
+def request_timing_middleware(timings: RequestTimings):
+    def middleware(make_request, web3):
+        def timed_request(method, params):
+            with timings.time(method):
+                return make_request(method, params)
+        return timed_request
+    return middleware
+
+
+def init_contracts(web3: Web3, sm_abi: dict) -> tuple:
+    schains_internal_contract = web3.eth.contract(
+        address=sm_abi['schains_internal_address'],
+        abi=sm_abi['schains_internal_abi']
+    )
+    schains_contract = web3.eth.contract(
+        address=sm_abi['schains_address'],
+        abi=sm_abi['schains_abi']
+    )
+    nodes_contract = web3.eth.contract(
+        address=sm_abi['nodes_address'],
+        abi=sm_abi['nodes_abi']
+    )
+    return schains_internal_contract, schains_contract, nodes_contract
@@ -0,0 +1,140 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3._utils.events import get_event_data
+
+from proxy.node_info import NodeInfoCache
+from proxy.registry_cache import RegistryCache
+from proxy.config import EVENT_LOGS_MAX_RANGE
+
+logger = logging.getLogger(__name__)
+
+SCHAIN_LIST_EVENTS = ('SchainCreated', 'SchainDeleted')
+TOPOLOGY_EVENTS = SCHAIN_LIST_EVENTS + (
+    'NodeRotated', 'NodeAdded', 'NodeCreated', 'ExitCompleted', 'NodeRemoved',
+    'IPChanged', 'DomainNameChanged', 'NodeDomainNameChanged'
+)
+SCHAIN_HASH_ARGS = ('schainHash', 'schainId')
+NODE_ID_ARGS = ('nodeIndex', 'nodeId', 'oldNode', 'newNode')
+
+
+class TopologyChanges:
+    """sChains and nodes affected by SKALE Manager events in a block range"""
+
+    def __init__(self):
+        self.schain_list_changed = False
+        self.schain_hashes = set()
+        self.node_ids = set()
+        self.events = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.schain_list_changed or self.schain_hashes or self.node_ids)
+
+    def add_event(self, name: str, args: dict) -> None:
+        self.events += 1
+        if name in SCHAIN_LIST_EVENTS:
+            self.schain_list_changed = True
+        for arg in SCHAIN_HASH_ARGS:
+            if arg in args:
+                self.schain_hashes.add(bytes(args[arg]))
+        for arg in NODE_ID_ARGS:
+            if arg in args:
+                self.node_ids.add(args[arg])
+
+    def to_dict(self) -> dict:
+        return {
+            'events': self.events,
+            'schain_list_changed': self.schain_list_changed,
+            'schains': len(self.schain_hashes),
+            'nodes': len(self.node_ids)
+        }
+
+
+def topology_event_abis(contracts: tuple) -> dict:
+    """Maps topic of each topology event found in contract ABIs to the event ABI"""
+    event_abis = {}
+    for contract in contracts:
+        for abi in contract.abi:
+            if abi.get('type') == 'event' and abi.get('name') in TOPOLOGY_EVENTS:
+                event_abis[HexBytes(event_abi_to_log_topic(abi))] = abi
+    return event_abis
+
+
+def fetch_topology_changes(
+    contracts: tuple,
+    from_block: int,
+    to_block: int,
+    max_range: int = EVENT_LOGS_MAX_RANGE
+) -> TopologyChanges:
+    """Reads SKALE Manager logs from from_block to to_block inclusive with eth_getLogs"""
+    web3 = contracts[0].web3
+    event_abis = topology_event_abis(contracts)
+    addresses = [contract.address for contract in contracts]
+    changes = TopologyChanges()
+    if not event_abis:
+        raise ValueError('SKALE Manager ABI has no topology events')
+    for start in range(from_block, to_block + 1, max_range):
+        logs = web3.eth.get_logs({
+            'fromBlock': start,
+            'toBlock': min(start + max_range - 1, to_block),
+            'address': addresses
+        })
+        for log in logs:
+            if not log['topics'] or HexBytes(log['topics'][0]) not in event_abis:
+                continue
+            event = get_event_data(web3.codec, event_abis[HexBytes(log['topics'][0])], log)
+            changes.add_event(event['event'], event['args'])
+    return changes
+
+
+def apply_topology_changes(
+    changes: TopologyChanges,
+    registry_cache: RegistryCache,
+    schain_hashes: list,
+    new_groups: dict = None
+) -> tuple:
+    """
+    Returns known sChains and a node info cache without the entries affected by changes.
+    Besides nodes from events, records of nodes of removed and new sChains (new_groups) are
+    dropped, because the list of sChains on these nodes has changed.
+    """
+    affected_nodes = set(changes.node_ids)
+    for node_ids in (new_groups or {}).values():
+        affected_nodes.update(node_ids)
+    for schain_hash in set(registry_cache.schains) - set(schain_hashes):
+        affected_nodes.update(registry_cache.schains[schain_hash]['node_ids'])
+    known_schains = {
+        schain_hash: registry_cache.schains[schain_hash]
+        for schain_hash in schain_hashes
+        if schain_hash in registry_cache.schains and schain_hash not in changes.schain_hashes
+    }
+    valid_records = {
+        node_id: record
+        for node_id, record in registry_cache.nodes.items()
+        if node_id not in affected_nodes
+    }
+    logger.info(f'Topology events: {changes.to_dict()}, \
+{len(schain_hashes) - len(known_schains)} sChains and {len(affected_nodes)} nodes to re-read')
+    return known_schains, NodeInfoCache(valid_records)
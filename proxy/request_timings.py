@@ -0,0 +1,75 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import threading
+from time import monotonic
+
+
+class RequestTimings:
+    """Thread-safe counters of request number and duration, grouped by method"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, method: str, elapsed: float, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                method, {'calls': 0, 'failures': 0, 'total': 0.0, 'max': 0.0})
+            stats['calls'] += 1
+            stats['failures'] += failed
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+
+    def time(self, method: str):
+        return _TimedRequest(self, method)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                method: {
+                    'calls': stats['calls'],
+                    'failures': stats['failures'],
+                    'avg': round(stats['total'] / stats['calls'], 4),
+                    'max': round(stats['max'], 4)
+                }
+                for method, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+
+class _TimedRequest:
+    def __init__(self, timings: RequestTimings, method: str):
+        self.timings = timings
+        self.method = method
+
+    def __enter__(self):
+        self.start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings.record(self.method, monotonic() - self.start, failed=exc_type is not None)
+        return False
+
+
+eth_request_timings = RequestTimings()
@@ -0,0 +1,142 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import re
+
+from proxy.config import RPC_CACHE_IMMUTABLE_TTL, RPC_CACHE_HISTORICAL_TTL, RPC_CACHE_RECENT_TTL
+
+IMMUTABLE = 'immutable'
+HISTORICAL = 'historical'
+RECENT = 'recent'
+UNCACHEABLE = 'uncacheable'
+# Classes cached for long, their responses with errors or null results are not cached
+CHECKED_CLASSES = (IMMUTABLE, HISTORICAL)
+
+IMMUTABLE_METHODS = (
+    'eth_chainId',
+    'net_version'
+)
+# Results for an explicit block number don't change once the block exists, so they are cached
+# longer only for blocks at or below the chain head. Other tags follow the head of the chain
+BLOCK_NUMBER_METHODS = (
+    'eth_getBlockByNumber',
+    'eth_getBlockTransactionCountByNumber',
+    'eth_getTransactionByBlockNumberAndIndex'
+)
+# Receipts, transactions and blocks by hash are null until mined, so they are cached only briefly
+RECENT_METHODS = BLOCK_NUMBER_METHODS + (
+    'eth_getBlockByHash',
+    'eth_getBlockTransactionCountByHash',
+    'eth_getTransactionByBlockHashAndIndex',
+    'eth_blockNumber',
+    'eth_gasPrice',
+    'eth_call',
+    'eth_getBalance',
+    'eth_getCode',
+    'eth_getStorageAt',
+    'eth_getLogs',
+    'eth_getTransactionByHash',
+    'eth_getTransactionReceipt',
+    'web3_clientVersion'
+)
+
+BLOCK_NUMBER_RE = re.compile(r'^0x[0-9a-fA-F]+$')
+METHOD_PATTERN = r'"method"\s*:\s*"({methods})"'
+
+# Prefix lengths of nginx $time_iso8601 (2024-01-01T00:00:00+00:00) and their durations
+TIME_BUCKETS = ((86400, 10), (3600, 13), (600, 15), (60, 16), (10, 18), (1, 19))
+
+
+def classify_request(body, head_block: int = -1) -> str:
+    """Returns cache class of a raw JSON-RPC request body, batches are not cached"""
+    try:
+        call = json.loads(body)
+    except (TypeError, ValueError):
+        return UNCACHEABLE
+    if not isinstance(call, dict):
+        return UNCACHEABLE
+    return classify_call(call.get('method'), call.get('params'), head_block)
+
+
+def classify_call(method: str, params: list = None, head_block: int = -1) -> str:
+    if method in IMMUTABLE_METHODS:
+        return IMMUTABLE
+    if method in BLOCK_NUMBER_METHODS and 0 <= _block_number(params) <= head_block:
+        return HISTORICAL
+    if method in RECENT_METHODS:
+        return RECENT
+    return UNCACHEABLE
+
+
+def _block_number(params) -> int:
+    if not params or not isinstance(params, list) or not isinstance(params[0], str) or \
+            BLOCK_NUMBER_RE.match(params[0]) is None:
+        return -1
+    return int(params[0], 16)
+
+
+def block_digits(head_block: int) -> int:
+    """Number of hex digits of the chain head, shorter block numbers are below it"""
+    return len(f'{head_block:x}') if head_block > 0 else 0
+
+
+def cache_ttls() -> dict:
+    return {
+        IMMUTABLE: RPC_CACHE_IMMUTABLE_TTL,
+        HISTORICAL: RPC_CACHE_HISTORICAL_TTL,
+        RECENT: RPC_CACHE_RECENT_TTL
+    }
+
+
+def nginx_class_patterns(digits: list = ()) -> list:
+    """
+    Regexes matched by nginx against "<head block digits>|<request body>", the first match wins.
+    Block numbers are historical only if they have fewer hex digits than the chain head.
+    Keys of the request object are expected in method, params order to detect block numbers,
+    other bodies fall back to a class with a shorter TTL.
+    """
+    block_methods = METHOD_PATTERN.format(methods='|'.join(BLOCK_NUMBER_METHODS))
+    patterns = [(r'^\d*\|\s*\[', UNCACHEABLE)]
+    for head_digits in sorted(set(d for d in digits if d > 1)):
+        patterns.append((
+            f'^{head_digits}\\|.*{block_methods}\\s*,\\s*"params"\\s*:\\s*\\[\\s*'
+            f'"0x(0|[1-9a-fA-F][0-9a-fA-F]{{0,{head_digits - 2}}})"',
+            HISTORICAL
+        ))
+    patterns.append((METHOD_PATTERN.format(methods='|'.join(IMMUTABLE_METHODS)), IMMUTABLE))
+    patterns.append((METHOD_PATTERN.format(methods='|'.join(RECENT_METHODS)), RECENT))
+    return patterns
+
+
+def nginx_cache_buckets(ttls: dict = None) -> list:
+    """
+    Regexes that cut $time_iso8601 to the largest period not longer than the class TTL.
+    Current period is a part of the cache key, so entries expire at the end of it.
+    Classes with zero TTL are left out and are not cached.
+    """
+    ttls = ttls or cache_ttls()
+    buckets = []
+    for cache_class, ttl in ttls.items():
+        if ttl <= 0:
+            continue
+        length = next(length for period, length in TIME_BUCKETS if period <= ttl)
+        buckets.append((f'^{cache_class}\\|(.{{{length}}})', cache_class))
+    return buckets
@@ -0,0 +1,154 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2026-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import math
+import threading
+from dataclasses import dataclass
+
+from proxy.config import (
+    MAX_UPSTREAM_WEIGHT, SLOW_NODE_RTT_FACTOR, BACKUP_BLOCK_LAG, RTT_EWMA_ALPHA,
+    RTT_CHANGE_THRESHOLD, SCORE_CHANGE_AFTER
+)
+
+logger = logging.getLogger(__name__)
+
+RTT_FLOOR = 0.02
+
+
+@dataclass
+class EndpointStats:
+    endpoint: str
+    rtt: float
+    block_lag: int
+
+
+@dataclass
+class EndpointScore:
+    weight: int
+    backup: bool = False
+
+
+def latency_weight_model(stats: list) -> list:
+    """
+    Default scoring model for healthy endpoints of a chain.
+    Weight is halved each time endpoint RTT doubles compared to the fastest endpoint, so small
+    RTT jitter doesn't change the weights. Endpoints that are SLOW_NODE_RTT_FACTOR times slower
+    than the fastest one or lag more than BACKUP_BLOCK_LAG blocks are marked as backup.
+
+    :param stats: list of EndpointStats
+    :return: list of EndpointScore in the same order
+    """
+    if not stats:
+        return []
+    best_rtt = max(min(_rtt(s) for s in stats), RTT_FLOOR)
+    scores = []
+    for endpoint_stats in stats:
+        ratio = _rtt(endpoint_stats) / best_rtt
+        scores.append(EndpointScore(
+            weight=max(MAX_UPSTREAM_WEIGHT >> int(math.log2(ratio)), 1),
+            backup=ratio >= SLOW_NODE_RTT_FACTOR or endpoint_stats.block_lag > BACKUP_BLOCK_LAG
+        ))
+    return _unmark_all_backup(scores)
+
+
+def _unmark_all_backup(scores: list) -> list:
+    if scores and all(score.backup for score in scores):
+        return [EndpointScore(weight=score.weight) for score in scores]
+    return scores
+
+
+def _rtt(endpoint_stats: EndpointStats) -> float:
+    return max(endpoint_stats.rtt or 0, RTT_FLOOR)
+
+
+@dataclass
+class ScoreState:
+    rtt: float = None
+    anchor_rtt: float = None
+    score: EndpointScore = None
+    pending: EndpointScore = None
+    pending_checks: int = 0
+
+
+class ScoreTracker:
+    """
+    Keeps endpoint scores stable between health checks. RTT is smoothed with EWMA and the
+    model gets the same RTT until the smoothed one moves more than change_threshold away from
+    it. A new weight or backup flag is applied only after change_after checks in a row agree
+    on it, the first score of an unknown endpoint is applied right away.
+    """
+
+    def __init__(
+        self,
+        alpha: float = RTT_EWMA_ALPHA,
+        change_threshold: float = RTT_CHANGE_THRESHOLD,
+        change_after: int = SCORE_CHANGE_AFTER
+    ):
+        self.alpha = alpha
+        self.change_threshold = change_threshold
+        self.change_after = change_after
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def smooth_rtt(self, endpoint: str, rtt: float) -> float:
+        """Records RTT sample and returns RTT of the endpoint to score it with"""
+        with self._lock:
+            state = self._states.setdefault(endpoint, ScoreState())
+            if rtt is None:
+                return state.anchor_rtt
+            state.rtt = rtt if state.rtt is None else state.rtt + self.alpha * (rtt - state.rtt)
+            if state.anchor_rtt is None or \
+                    abs(state.rtt - state.anchor_rtt) > self.change_threshold * state.anchor_rtt:
+                state.anchor_rtt = state.rtt
+            return state.anchor_rtt
+
+    def stabilize(self, endpoints: list, scores: list) -> list:
+        """Returns scores to apply for the endpoints of one chain"""
+        with self._lock:
+            return _unmark_all_backup([
+                self._stabilize(endpoint, score) for endpoint, score in zip(endpoints, scores)
+            ])
+
+    def _stabilize(self, endpoint: str, score: EndpointScore) -> EndpointScore:
+        state = self._states.setdefault(endpoint, ScoreState())
+        if state.score is None or score == state.score:
+            state.score, state.pending, state.pending_checks = score, None, 0
+            return score
+        if score == state.pending:
+            state.pending_checks += 1
+        else:
+            state.pending, state.pending_checks = score, 1
+        if state.pending_checks >= self.change_after:
+            logger.info(f'{endpoint} score changed: {state.score} -> {score}')
+            state.score, state.pending, state.pending_checks = score, None, 0
+        return state.score
+
+    def retain(self, endpoints: set) -> None:
+        """Forgets endpoints that are not served anymore"""
+        with self._lock:
+            self._states = {e: s for e, s in self._states.items() if e in endpoints}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states = {}
+
+
+score_tracker = ScoreTracker()
@@ -0,0 +1,120 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from proxy.probe import ProbeResult
+from proxy.config import (
+    ALLOWED_TIMESTAMP_DIFF, ALLOWED_BLOCK_LAG, SYNC_EVICT_AFTER, SYNC_READMIT_AFTER
+)
+
+logger = logging.getLogger(__name__)
+
+UNREACHABLE = 'unreachable'
+TIMESTAMP_LAG = 'timestamp_lag'
+BLOCK_LAG = 'block_lag'
+SYNCING = 'syncing'
+INFO_PORT = 'info_port'
+
+
+@dataclass
+class SyncCheck:
+    reasons: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.reasons
+
+
+@dataclass
+class MembershipState:
+    healthy: bool
+    failures: int = 0
+    successes: int = 0
+
+
+def check_sync(probe: ProbeResult, max_ts: int, max_block_number: int) -> SyncCheck:
+    """Combines probe results of a node with the chain maximums into a list of problems"""
+    check = SyncCheck()
+    if not probe.alive:
+        check.reasons.append(UNREACHABLE)
+        return check
+    if abs(max_ts - probe.block_ts) > ALLOWED_TIMESTAMP_DIFF:
+        check.reasons.append(TIMESTAMP_LAG)
+    if max_block_number - probe.block_number > ALLOWED_BLOCK_LAG:
+        check.reasons.append(BLOCK_LAG)
+    if probe.syncing:
+        check.reasons.append(SYNCING)
+    if probe.info_block_number is not None and \
+            max_block_number - probe.info_block_number > ALLOWED_BLOCK_LAG:
+        check.reasons.append(INFO_PORT)
+    return check
+
+
+class SyncTracker:
+    """
+    Applies hysteresis to node health: a healthy endpoint is evicted after evict_after
+    failed checks in a row and re-admitted after readmit_after successful ones.
+    The first check of an unknown endpoint decides its state right away.
+    """
+
+    def __init__(
+        self,
+        evict_after: int = SYNC_EVICT_AFTER,
+        readmit_after: int = SYNC_READMIT_AFTER
+    ):
+        self.evict_after = evict_after
+        self.readmit_after = readmit_after
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, endpoint: str, ok: bool) -> bool:
+        """Records check result and returns True if endpoint should be in the upstream"""
+        with self._lock:
+            state = self._states.get(endpoint)
+            if state is None:
+                self._states[endpoint] = MembershipState(healthy=ok)
+                return ok
+            if state.healthy:
+                state.failures = 0 if ok else state.failures + 1
+                if state.failures >= self.evict_after:
+                    logger.info(f'{endpoint} failed {state.failures} checks in a row, evicting')
+                    state.healthy, state.successes = False, 0
+            else:
+                state.successes = state.successes + 1 if ok else 0
+                if state.successes >= self.readmit_after:
+                    logger.info(f'{endpoint} passed {state.successes} checks in a row, \
+re-admitting')
+                    state.healthy, state.failures = True, 0
+            return state.healthy
+
+    def retain(self, endpoints: set) -> None:
+        """Forgets endpoints that are not served anymore"""
+        with self._lock:
+            self._states = {e: s for e, s in self._states.items() if e in endpoints}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states = {}
+
+
+sync_tracker = SyncTracker()
@@ -0,0 +1,188 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of SKALE Proxy
+#
+#   Copyright (C) 2022-Present SKALE Labs
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import json
+import logging
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import time_ns
+
+from proxy.config import TRACE_EXPORTER, TRACE_FILEPATH, PROFILE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+LOG_EXPORTER = 'log'
+FILE_EXPORTER = 'file'
+SERVICE_NAME = 'skale-proxy'
+SPAN_KIND_INTERNAL = 1
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_context = threading.local()
+_file_lock = threading.Lock()
+_profile_lock = threading.Lock()
+# Profiles of thread pool tasks that ran while profile() was active, None if it is not
+_worker_profiles = None
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start_ns = time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        """Returns span as OTLP/JSON ExportTraceServiceRequest"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_INTERNAL,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error
+            else {'code': STATUS_OK}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span]}]
+        }]}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the wrapped block. Spans opened inside it in the same thread become its children,
+    a span without a parent starts a new trace.
+    """
+    stack = _get_stack()
+    parent = stack[-1] if stack else None
+    current = Span(
+        name,
+        trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes
+    )
+    stack.append(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = repr(e)
+        raise
+    finally:
+        stack.pop()
+        current.end_ns = time_ns()
+        export_span(current)
+
+
+def export_span(finished: Span, exporter: str = None, filepath: str = None) -> None:
+    exporter = TRACE_EXPORTER if exporter is None else exporter
+    if exporter == LOG_EXPORTER:
+        attributes = ' '.join(f'{k}={v}' for k, v in finished.attributes.items())
+        logger.info(f'span={finished.name} duration={finished.duration:.3f}s '
+                    f'trace={finished.trace_id[:8]} {attributes}'.rstrip())
+    elif exporter == FILE_EXPORTER:
+        line = json.dumps(finished.to_otlp(), separators=(',', ':'))
+        with _file_lock, open(filepath or TRACE_FILEPATH, 'a') as f:
+            f.write(line + '\n')
+
+
+@contextmanager
+def profile(name: str, enabled: bool):
+    """
+    Dumps cProfile stats of the wrapped block to PROFILE_FOLDER if enabled.
+    Stats of thread pool tasks wrapped with profiled() are merged into the same file.
+    """
+    global _worker_profiles
+    if not enabled:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    with _profile_lock:
+        _worker_profiles = []
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        with _profile_lock:
+            worker_profiles, _worker_profiles = _worker_profiles, None
+        stats = pstats.Stats(profiler)
+        for worker_profile in worker_profiles:
+            stats.add(worker_profile)
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        path = os.path.join(PROFILE_FOLDER, f'{name}-{time_ns() // 10 ** 9}.prof')
+        stats.dump_stats(path)
+        logger.info(f'Profile of {name} saved to {path}, {len(worker_profiles)} worker tasks')
+
+
+def profiled(fn):
+    """Wraps a thread pool task, so it is profiled while profile() is active in any thread"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _worker_profiles is None:
+            return fn(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with _profile_lock:
+                if _worker_profiles is not None:
+                    _worker_profiles.append(profiler)
+    return wrapper
+
+
+def _get_stack() -> list:
+    if not hasattr(_context, 'stack'):
+        _context.stack = []
+    return _context.stack
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
@@ -0,0 +1,131 @@
+import os
+import socket
+import threading
+from time import sleep
+
+import pytest
+
+os.environ.setdefault('ETH_ENDPOINT', 'http://localhost:8545')
+
+from proxy.dns_cache import dns_cache  # noqa: E402
+from proxy.probe import ProbeResult  # noqa: E402
+from proxy.scoring import score_tracker  # noqa: E402
+from proxy.sync_scoring import sync_tracker  # noqa: E402
+
+NODES_PER_CHAIN = 4
+BASE_PORT = 10000
+HEALTHY_PROBE = ProbeResult(alive=True, block_ts=1000, block_number=100, rtt=0.01)
+
+
+class FakeContractCall:
+    def __init__(self, backend, name, args):
+        self.backend = backend
+        self.name = name
+        self.args = args
+
+    def call(self):
+        return self.backend.call(self.name, *self.args)
+
+
+class FakeContractFunctions:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return lambda *args: FakeContractCall(self.backend, name, args)
+
+
+class FakeContract:
+    def __init__(self, backend, address):
+        self.address = address
+        self.functions = FakeContractFunctions(backend)
+
+
+class FakeSkaleManager:
+    """In-memory SKALE Manager backend that simulates contract call latency"""
+
+    def __init__(self, chains_number, nodes_number=8, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.schain_names = [f'chain-{i}' for i in range(chains_number)]
+        self.schain_hashes = [name.encode() for name in self.schain_names]
+        self.groups = {
+            schain_hash: [(i + j) % nodes_number for j in range(NODES_PER_CHAIN)]
+            for i, schain_hash in enumerate(self.schain_hashes)
+        }
+        self.node_records = {
+            node_id: {
+                'name': f'node-{node_id}',
+                'ip': socket.inet_aton(f'10.0.0.{node_id + 1}'),
+                'domain': f'node-{node_id}.skale.test',
+                'schains': [h for h in self.schain_hashes if node_id in self.groups[h]]
+            }
+            for node_id in range(nodes_number)
+        }
+
+    def call(self, name, *args):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            sleep(self.latency)
+        return getattr(self, name)(*args)
+
+    def getSchains(self):
+        return list(self.schain_hashes)
+
+    def schains(self, schain_hash):
+        return [schain_hash.decode(), '0x0', 0]
+
+    def getOptions(self, schain_hash):
+        return []
+
+    def getNodesInGroup(self, schain_hash):
+        return list(self.groups[schain_hash])
+
+    def nodes(self, node_id):
+        node = self.node_records[node_id]
+        return [node['name'], node['ip'], node['ip'], BASE_PORT]
+
+    def getNodeDomainName(self, node_id):
+        return self.node_records[node_id]['domain']
+
+    def getSchainHashesForNode(self, node_id):
+        return list(self.node_records[node_id]['schains'])
+
+    def contracts(self):
+        return (
+            FakeContract(self, 'schains_internal'),
+            FakeContract(self, 'schains'),
+            FakeContract(self, 'nodes')
+        )
+
+
+@pytest.fixture(autouse=True)
+def reset_sync_tracker():
+    sync_tracker.reset()
+    score_tracker.reset()
+
+
+def _unresolvable(domain):
+    raise socket.gaierror(f'{domain} is not resolved in tests')
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    dns_cache.clear()
+    monkeypatch.setattr(dns_cache, 'resolver', _unresolvable)
+    return dns_cache
+
+
+@pytest.fixture
+def skale_manager():
+    return FakeSkaleManager(chains_number=4)
+
+
+@pytest.fixture
+def healthy_nodes(monkeypatch):
+    monkeypatch.setattr(
+        'proxy.endpoints.probe_nodes',
+        lambda http_endpoints, info_endpoints=None: [HEALTHY_PROBE] * len(http_endpoints)
+    )
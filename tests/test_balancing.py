@@ -0,0 +1,80 @@
+import logging
+import random
+import zlib
+from collections import Counter
+
+import pytest
+
+from proxy.balancing import (
+    IP_HASH, LEAST_CONN, RANDOM_TWO_LEAST_CONN, ROUND_ROBIN, balancing_directive, supports_backup
+)
+
+logger = logging.getLogger(__name__)
+
+NODES_NUMBER = 16
+HASH_HEADER = 'hash_header:X-Api-Key'
+
+
+def test_balancing_directive():
+    assert balancing_directive(ROUND_ROBIN) == ''
+    assert balancing_directive(IP_HASH) == 'ip_hash;'
+    assert balancing_directive(LEAST_CONN) == 'least_conn;'
+    assert balancing_directive(RANDOM_TWO_LEAST_CONN) == 'random two least_conn;'
+    assert balancing_directive(HASH_HEADER) == 'hash $http_x_api_key consistent;'
+    for strategy in ('fastest', 'hash_header:', 'hash_header:X;Api'):
+        with pytest.raises(ValueError):
+            balancing_directive(strategy)
+    assert supports_backup(LEAST_CONN)
+    assert not supports_backup(IP_HASH)
+
+
+def _generate_requests(requests_number, rng):
+    """Most of the traffic comes from a few large customers behind NAT"""
+    nat_clients = [(f'100.64.{i}.1', f'key-{i}') for i in range(3)]
+    requests = []
+    for i in range(requests_number):
+        if rng.random() < 0.7:
+            ip, api_key = rng.choice(nat_clients)
+            api_key = f'{api_key}-{rng.randrange(50)}'
+        else:
+            ip, api_key = f'10.{rng.randrange(256)}.{rng.randrange(256)}.1', f'key-user-{i}'
+        requests.append((ip, api_key, rng.randint(1, 20)))
+    return requests
+
+
+def simulate(strategy, requests, rng, requests_per_tick=50):
+    """Returns number of requests served by each node"""
+    active = [[] for _ in range(NODES_NUMBER)]
+    served = Counter()
+    for tick, (ip, api_key, duration) in enumerate(requests):
+        now = tick // requests_per_tick
+        for node_requests in active:
+            node_requests[:] = [end for end in node_requests if end > now]
+        load = [len(node_requests) for node_requests in active]
+        if strategy == IP_HASH:
+            node = zlib.crc32('.'.join(ip.split('.')[:3]).encode()) % NODES_NUMBER
+        elif strategy == HASH_HEADER:
+            node = zlib.crc32(api_key.encode()) % NODES_NUMBER
+        elif strategy == LEAST_CONN:
+            node = min(range(NODES_NUMBER), key=lambda n: (load[n], (n - tick) % NODES_NUMBER))
+        elif strategy == RANDOM_TWO_LEAST_CONN:
+            node = min(rng.sample(range(NODES_NUMBER), 2), key=lambda n: load[n])
+        else:
+            node = tick % NODES_NUMBER
+        active[node].append(now + duration)
+        served[node] += 1
+    return [served[node] for node in range(NODES_NUMBER)]
+
+
+def test_load_distribution():
+    rng = random.Random(42)
+    requests = _generate_requests(20000, rng)
+    imbalance = {}
+    for strategy in (IP_HASH, HASH_HEADER, LEAST_CONN, RANDOM_TWO_LEAST_CONN, ROUND_ROBIN):
+        distribution = simulate(strategy, requests, rng)
+        imbalance[strategy] = max(distribution) / (len(requests) / NODES_NUMBER)
+        logger.info(f'{strategy}: max/avg {imbalance[strategy]:.2f}, per node {distribution}')
+    assert imbalance[IP_HASH] > 3
+    assert imbalance[LEAST_CONN] < 1.2
+    assert imbalance[RANDOM_TWO_LEAST_CONN] < 1.2
+    assert imbalance[HASH_HEADER] < imbalance[IP_HASH]
@@ -0,0 +1,154 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from eth_abi import encode_abi
+from web3 import Web3, HTTPProvider
+
+from proxy import call_batch
+from proxy.call_batch import CallBatch
+from proxy.eth_failover import EndpointPool, FailoverHTTPProvider
+
+CONTRACT_ADDRESS = '0x' + '11' * 20
+DOMAIN_ABI = [{
+    'name': 'getNodeDomainName',
+    'type': 'function',
+    'stateMutability': 'view',
+    'inputs': [{'name': 'nodeIndex', 'type': 'uint256'}],
+    'outputs': [{'name': '', 'type': 'string'}]
+}]
+
+
+class FakeRPCHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.server.requests += 1
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if isinstance(body, list):
+            if self.server.batch_failures:
+                self.server.batch_failures -= 1
+                return self._reply(503, {'error': 'overloaded'})
+            if not self.server.batch_enabled:
+                return self._reply(400, {'error': 'batch requests are not supported'})
+            return self._reply(200, [self._eth_call(item) for item in body])
+        return self._reply(200, self._eth_call(body))
+
+    def _eth_call(self, request):
+        node_id = int(request['params'][0]['data'][10:], 16)
+        result = encode_abi(['string'], [f'node-{node_id}.skale.test'])
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x' + result.hex()}
+
+    def _reply(self, status, data):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rpc_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeRPCHandler)
+    server.requests = 0
+    server.batch_enabled = True
+    server.batch_failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    call_batch._batch_unsupported_endpoints.clear()
+
+
+def _domain_contract(server):
+    web3 = Web3(HTTPProvider(f'http://127.0.0.1:{server.server_port}'))
+    return web3.eth.contract(address=Web3.toChecksumAddress(CONTRACT_ADDRESS), abi=DOMAIN_ABI)
+
+
+def _failover_contract(urls):
+    web3 = Web3(FailoverHTTPProvider(EndpointPool(urls, hedge_delay=0)))
+    return web3.eth.contract(address=Web3.toChecksumAddress(CONTRACT_ADDRESS), abi=DOMAIN_ABI)
+
+
+def _dead_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}'
+
+
+def _batch_domains(contract, node_ids):
+    batch = CallBatch(max_size=10)
+    for node_id in node_ids:
+        batch.add(contract.functions.getNodeDomainName(node_id))
+    return batch.execute()
+
+
+def test_call_batch(rpc_server):
+    contract = _domain_contract(rpc_server)
+    domains = _batch_domains(contract, range(16))
+    assert domains == [f'node-{i}.skale.test' for i in range(16)]
+    assert rpc_server.requests == 2
+
+
+def test_call_batch_fallback(rpc_server):
+    rpc_server.batch_enabled = False
+    contract = _domain_contract(rpc_server)
+    domains = _batch_domains(contract, range(4))
+    assert domains == [f'node-{i}.skale.test' for i in range(4)]
+    assert rpc_server.requests == 1 + 4
+
+    rpc_server.requests = 0
+    assert _batch_domains(contract, range(4)) == domains
+    assert rpc_server.requests == 4
+
+
+def test_call_batch_transient_failure(rpc_server):
+    rpc_server.batch_failures = 3
+    contract = _domain_contract(rpc_server)
+    domains = _batch_domains(contract, range(4))
+    assert domains == [f'node-{i}.skale.test' for i in range(4)]
+
+    rpc_server.requests = 0
+    assert _batch_domains(contract, range(4)) == domains
+    assert rpc_server.requests == 1
+
+
+def test_call_batch_retry_rejected(rpc_server, monkeypatch):
+    monkeypatch.setattr(call_batch, 'BATCH_RETRY_INTERVAL', 0)
+    rpc_server.batch_enabled = False
+    contract = _domain_contract(rpc_server)
+    _batch_domains(contract, range(4))
+    rpc_server.batch_enabled = True
+    _batch_domains(contract, range(4))
+
+    rpc_server.requests = 0
+    _batch_domains(contract, range(4))
+    assert rpc_server.requests == 1
+
+
+def test_call_batch_failover_provider(rpc_server):
+    contract = _failover_contract([_dead_url(), f'http://127.0.0.1:{rpc_server.server_port}'])
+    domains = _batch_domains(contract, range(16))
+    assert domains == [f'node-{i}.skale.test' for i in range(16)]
+    assert rpc_server.requests == 2
+
+
+def test_call_batch_failover_provider_rejected(rpc_server):
+    rpc_server.batch_enabled = False
+    contract = _failover_contract([f'http://127.0.0.1:{rpc_server.server_port}'])
+    assert _batch_domains(contract, range(4)) == [f'node-{i}.skale.test' for i in range(4)]
+    assert rpc_server.requests == 1 + 4
+    rpc_server.requests = 0
+    _batch_domains(contract, range(4))
+    assert rpc_server.requests == 4
+
+
+def test_call_batch_without_provider(skale_manager):
+    _, _, nodes_contract = skale_manager.contracts()
+    batch = CallBatch()
+    batch.add(nodes_contract.functions.getNodeDomainName(1))
+    assert batch.execute() == ['node-1.skale.test']
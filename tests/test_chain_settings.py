@@ -0,0 +1,56 @@
+import json
+
+from proxy.chain_settings import load_chain_overrides, get_chain_settings
+
+
+def _chain_info(name, nodes_number):
+    return {
+        'schain_name': name,
+        'http_endpoints': [f'node-{i}.skale.test:10003' for i in range(nodes_number)]
+    }
+
+
+def test_load_chain_overrides(tmp_path):
+    path = tmp_path / 'chain_overrides.json'
+    assert load_chain_overrides(str(path)) == {}
+    path.write_text('{"chain-0": ')
+    assert load_chain_overrides(str(path)) == {}
+    path.write_text(json.dumps({'chain-0': {'keepalive': 8}}))
+    assert load_chain_overrides(str(path)) == {'chain-0': {'keepalive': 8}}
+
+
+def test_get_chain_settings():
+    assert get_chain_settings(_chain_info('chain-0', 4), {}) == {
+        'keepalive': 64,
+        'keepalive_requests': 10000,
+        'keepalive_timeout': 60,
+        'rpc_cache': False,
+        'rpc_cache_max_size': '64m',
+        'rpc_cache_keys_zone_size': '1m',
+        'http_balancing': 'ip_hash',
+        'ws_balancing': 'ip_hash',
+        'fs_balancing': 'ip_hash'
+    }
+    assert get_chain_settings(_chain_info('chain-0', 32), {})['keepalive'] == 256
+    assert get_chain_settings(_chain_info('chain-0', 0), {})['keepalive'] == 16
+
+    overrides = {
+        '*': {'keepalive_timeout': 30, 'keepalive': 32},
+        'chain-0': {'keepalive': 128}
+    }
+    settings = get_chain_settings(_chain_info('chain-0', 4), overrides)
+    assert settings['keepalive'] == 128
+    assert settings['keepalive_timeout'] == 30
+    assert get_chain_settings(_chain_info('chain-1', 4), overrides)['keepalive'] == 32
+
+
+def test_get_chain_settings_balancing():
+    overrides = {
+        'chain-0': {'http_balancing': 'least_conn', 'ws_balancing': 'hash_header:X-Api-Key'},
+        'chain-1': {'http_balancing': 'fastest'}
+    }
+    settings = get_chain_settings(_chain_info('chain-0', 4), overrides)
+    assert settings['http_balancing'] == 'least_conn'
+    assert settings['ws_balancing'] == 'hash_header:X-Api-Key'
+    assert settings['fs_balancing'] == 'ip_hash'
+    assert get_chain_settings(_chain_info('chain-1', 4), overrides)['http_balancing'] == 'ip_hash'
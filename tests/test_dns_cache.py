@@ -0,0 +1,57 @@
+import socket
+import threading
+from time import sleep, monotonic
+
+from proxy.dns_cache import DnsCache
+
+
+class FakeResolver:
+    def __init__(self, ttl=60, latency=0.0):
+        self.ttl = ttl
+        self.latency = latency
+        self.addresses = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, domain):
+        with self._lock:
+            self.calls += 1
+        sleep(self.latency)
+        if domain not in self.addresses:
+            raise socket.gaierror(f'{domain} is unknown')
+        return self.addresses[domain], self.ttl
+
+
+def test_resolve_many_concurrently():
+    resolver = FakeResolver(latency=0.2)
+    resolver.addresses = {f'node-{i}.skale.test': (f'10.0.0.{i}',) for i in range(16)}
+    cache = DnsCache(resolver=resolver, concurrency=16)
+    start = monotonic()
+    addresses = cache.resolve_many(list(resolver.addresses) + ['unknown.skale.test'])
+    assert monotonic() - start < 1
+    assert addresses['node-3.skale.test'] == '10.0.0.3'
+    assert addresses['unknown.skale.test'] is None
+
+
+def test_resolve_many_ttl():
+    resolver = FakeResolver(ttl=0)
+    resolver.addresses = {'node.skale.test': ('10.0.0.2', '10.0.0.1')}
+    cache = DnsCache(resolver=resolver, min_ttl=60)
+    assert cache.resolve_many(['node.skale.test']) == {'node.skale.test': '10.0.0.2'}
+    resolver.addresses['node.skale.test'] = ('10.0.0.3',)
+    assert cache.resolve_many(['node.skale.test']) == {'node.skale.test': '10.0.0.2'}
+    assert resolver.calls == 1
+
+    cache.min_ttl = 0
+    cache.clear()
+    cache.resolve_many(['node.skale.test'])
+    del resolver.addresses['node.skale.test']
+    assert cache.resolve_many(['node.skale.test']) == {'node.skale.test': '10.0.0.3'}
+    assert resolver.calls == 3
+
+
+def test_resolve_ip_address():
+    resolver = FakeResolver()
+    cache = DnsCache(resolver=resolver)
+    assert cache.resolve_many(['10.0.0.1']) == {'10.0.0.1': '10.0.0.1'}
+    assert resolver.calls == 0
@@ -0,0 +1,157 @@
+import logging
+from time import monotonic, sleep
+
+import pytest
+
+from proxy.endpoints import (
+    collect_endpoints, discover_schains, public_endpoints, refresh_chains_info
+)
+from proxy.node_info import NodeInfoCache, NODE_INFO_CALLS
+from proxy.config import SYNC_EVICT_AFTER
+from proxy.probe import ProbeResult
+from proxy.registry_cache import RegistryCache
+
+from tests.conftest import FakeSkaleManager, NODES_PER_CHAIN
+
+logger = logging.getLogger(__name__)
+
+CALL_LATENCY = 0.005
+
+
+def test_discover_schains_order(skale_manager, healthy_nodes):
+    contracts = skale_manager.contracts()
+    serial = discover_schains(*contracts, skale_manager.schain_hashes, concurrency=1)
+    concurrent = discover_schains(*contracts, skale_manager.schain_hashes, concurrency=8)
+    assert [e['schain'][0] for e in concurrent] == skale_manager.schain_names
+    assert concurrent == serial
+
+
+@pytest.mark.parametrize('chains_number', [4, 16, 32])
+def test_discover_schains_scaling(chains_number, healthy_nodes):
+    skale_manager = FakeSkaleManager(chains_number=chains_number, latency=CALL_LATENCY)
+    contracts = skale_manager.contracts()
+    timings = {}
+    for concurrency in (1, 8):
+        start = monotonic()
+        discover_schains(*contracts, skale_manager.schain_hashes, concurrency=concurrency)
+        timings[concurrency] = monotonic() - start
+    logger.info(f'{chains_number} chains: serial {timings[1]:.3f}s, concurrent {timings[8]:.3f}s')
+    assert timings[8] < timings[1]
+
+
+def test_discover_schains_node_cache(healthy_nodes):
+    skale_manager = FakeSkaleManager(chains_number=16, nodes_number=8)
+    contracts = skale_manager.contracts()
+    uncached = discover_schains(*contracts, skale_manager.schain_hashes)
+    uncached_calls, skale_manager.calls = skale_manager.calls, 0
+
+    node_cache = NodeInfoCache()
+    cached = discover_schains(*contracts, skale_manager.schain_hashes, node_cache=node_cache)
+    assert cached == uncached
+    assert node_cache.misses == 8
+    assert node_cache.hits == 16 * NODES_PER_CHAIN - 8
+    assert skale_manager.calls == uncached_calls - node_cache.hits * NODE_INFO_CALLS
+
+
+def test_refresh_chains_info(skale_manager, healthy_nodes, monkeypatch):
+    schains_endpoints = discover_schains(*skale_manager.contracts(), skale_manager.schain_hashes)
+    assert not refresh_chains_info(schains_endpoints)
+
+    dead_endpoint = schains_endpoints[0]['nodes'][0]['http_endpoint_domain']
+    monkeypatch.setattr('proxy.endpoints.probe_nodes', lambda http_endpoints, info=None: [
+        ProbeResult(alive=endpoint != dead_endpoint, block_ts=1000, block_number=100, rtt=0.01)
+        for endpoint in http_endpoints
+    ])
+    for _ in range(SYNC_EVICT_AFTER - 1):
+        assert not refresh_chains_info(schains_endpoints)
+    assert refresh_chains_info(schains_endpoints)
+    assert dead_endpoint.removeprefix('http://') not in \
+        schains_endpoints[0]['chain_info']['http_endpoints']
+    assert not refresh_chains_info(schains_endpoints)
+
+
+def test_refresh_chains_info_ignores_weights(skale_manager, monkeypatch):
+    rtts = iter([0.01, 0.1] * 20)
+    monkeypatch.setattr('proxy.endpoints.probe_nodes', lambda http_endpoints, info=None: [
+        ProbeResult(alive=True, block_ts=1000, block_number=100, rtt=next(rtts))
+        for _ in http_endpoints
+    ])
+    schains_endpoints = discover_schains(
+        *skale_manager.contracts(), skale_manager.schain_hashes[:1])
+    for _ in range(4):
+        assert not refresh_chains_info(schains_endpoints)
+    assert 'weights' not in public_endpoints(schains_endpoints)[0]['chain_info']
+    assert 'weights' in schains_endpoints[0]['chain_info']
+
+
+def test_refresh_chains_info_dns_change(skale_manager, healthy_nodes, fake_dns):
+    resolved = {}
+    fake_dns.resolver = lambda domain: ((resolved.get(domain, '10.0.0.1'),), 0)
+    fake_dns.min_ttl = 0
+    schains_endpoints = discover_schains(*skale_manager.contracts(), skale_manager.schain_hashes)
+    chain_info = schains_endpoints[0]['chain_info']
+    assert chain_info['http_addresses'][0] == '10.0.0.1:10003'
+    assert chain_info['fs_addresses'][0] == '10.0.0.1'
+    assert not refresh_chains_info(schains_endpoints)
+
+    resolved[schains_endpoints[0]['nodes'][0]['domain']] = '10.0.0.2'
+    assert refresh_chains_info(schains_endpoints)
+    assert schains_endpoints[0]['chain_info']['http_addresses'][0] == '10.0.0.2:10003'
+
+
+def test_discover_schains_deadlines(healthy_nodes, monkeypatch):
+    skale_manager = FakeSkaleManager(chains_number=4)
+    slow_hash, broken_hash = skale_manager.schain_hashes[1], skale_manager.schain_hashes[2]
+    get_group = skale_manager.getNodesInGroup
+
+    def getNodesInGroup(schain_hash):
+        if schain_hash == slow_hash:
+            sleep(2)
+        return get_group(schain_hash)
+
+    monkeypatch.setattr(skale_manager, 'getNodesInGroup', getNodesInGroup)
+    skale_manager.node_records[skale_manager.groups[broken_hash][0]]['schains'].remove(broken_hash)
+
+    start = monotonic()
+    schains_endpoints = discover_schains(
+        *skale_manager.contracts(), skale_manager.schain_hashes, chain_timeout=0.5)
+    assert monotonic() - start < 2
+    assert [e and e['schain'][0] for e in schains_endpoints] == ['chain-0', None, None, 'chain-3']
+    assert schains_endpoints[0]['chain_info']['stale'] is False
+
+    schains_endpoints = discover_schains(
+        *skale_manager.contracts(), skale_manager.schain_hashes, budget=0.5)
+    assert schains_endpoints[1] is None
+
+
+def test_collect_endpoints_stale(tmp_path, healthy_nodes, monkeypatch):
+    skale_manager = FakeSkaleManager(chains_number=4)
+    registry_cache = RegistryCache(str(tmp_path / 'registry_cache.json'))
+    previous = collect_endpoints(
+        *skale_manager.contracts(), block_number=1, registry_cache=registry_cache)
+
+    broken_hash = skale_manager.schain_hashes[2]
+    skale_manager.groups[broken_hash][0] = 7
+    skale_manager.node_records[3]['domain'] = 'node-3.rotated.skale.test'
+    endpoints = collect_endpoints(
+        *skale_manager.contracts(), block_number=2, registry_cache=registry_cache,
+        previous_endpoints=previous)
+    assert [e['chain_info']['stale'] for e in endpoints] == [False, False, True, False]
+    assert endpoints[2]['nodes'] == previous[2]['nodes']
+    assert registry_cache.block_number == 2
+    assert registry_cache.unresolved == {broken_hash}
+    assert registry_cache.schains[broken_hash]['node_ids'] == [
+        node['id'] for node in previous[2]['nodes']]
+    assert RegistryCache(registry_cache.filepath).load()
+
+    skale_manager.groups[broken_hash][0] = 3
+    skale_manager.calls = 0
+    recovered = collect_endpoints(
+        *skale_manager.contracts(), block_number=2, registry_cache=registry_cache,
+        previous_endpoints=endpoints)
+    assert 0 < skale_manager.calls
+    assert not any(e['chain_info']['stale'] for e in recovered)
+    assert registry_cache.unresolved == set()
+
+    refresh_chains_info(endpoints)
+    assert endpoints[2]['chain_info']['stale']
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+
+import pytest
+from eth_abi import encode_abi
+from web3 import Web3, HTTPProvider
+
+from proxy.eth_failover import EndpointPool, EthEndpointsUnavailable, FailoverHTTPProvider
+
+logger = logging.getLogger(__name__)
+
+READS_NUMBER = 100
+SLOW_EVERY = 10
+SLOW_DELAY = 0.5
+HEDGE_DELAY = 0.05
+CONTRACT_ADDRESS = Web3.toChecksumAddress('0x' + '11' * 20)
+NODES_ABI = [{
+    'name': 'getNumberOfNodes',
+    'type': 'function',
+    'stateMutability': 'view',
+    'inputs': [],
+    'outputs': [{'name': '', 'type': 'uint256'}]
+}]
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.requests += 1
+            slow = self.server.slow_every and self.server.requests % self.server.slow_every == 0
+        if slow:
+            sleep(SLOW_DELAY)
+        result = '0x' + encode_abi(['uint256'], [16]).hex()
+        if body['method'] == 'eth_chainId':
+            result = hex(1)
+        content = json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_provider(slow_every):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeProviderHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.slow_every = slow_every
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def providers():
+    servers = [_start_provider(SLOW_EVERY), _start_provider(SLOW_EVERY + 1)]
+    yield servers
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def dead_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}'
+
+
+def _read_latencies(web3):
+    contract = web3.eth.contract(address=CONTRACT_ADDRESS, abi=NODES_ABI)
+    latencies = []
+    for _ in range(READS_NUMBER):
+        start = monotonic()
+        assert contract.functions.getNumberOfNodes().call() == 16
+        latencies.append(monotonic() - start)
+    return sorted(latencies)
+
+
+def test_hedged_requests_tail_latency(providers):
+    single = _read_latencies(Web3(HTTPProvider(providers[0].url)))
+    pool = EndpointPool([server.url for server in providers], hedge_delay=HEDGE_DELAY)
+    hedged = _read_latencies(Web3(FailoverHTTPProvider(pool)))
+
+    p95 = int(READS_NUMBER * 0.95)
+    logger.info(f'{READS_NUMBER} reads: single provider p50 {single[READS_NUMBER // 2]:.4f}s \
+p95 {single[p95]:.4f}s, hedged p50 {hedged[READS_NUMBER // 2]:.4f}s p95 {hedged[p95]:.4f}s, \
+{pool.hedged} requests hedged')
+    assert single[p95] >= SLOW_DELAY
+    assert hedged[p95] < SLOW_DELAY / 2
+    assert pool.hedged > 0
+
+
+def test_failover_to_healthy_endpoint(providers, dead_url):
+    pool = EndpointPool([dead_url, providers[0].url], hedge_delay=0)
+    web3 = Web3(FailoverHTTPProvider(pool))
+    assert web3.eth.chain_id == 1
+    assert web3.eth.chain_id == 1
+
+    dead, healthy = pool.stats()
+    assert dead['failures'] == 1 and not dead['healthy']
+    assert healthy['requests'] == 2
+    assert pool.best_url() == providers[0].url
+
+
+def test_all_endpoints_unavailable(dead_url):
+    pool = EndpointPool([dead_url], hedge_delay=0)
+    with pytest.raises(EthEndpointsUnavailable):
+        Web3(FailoverHTTPProvider(pool)).eth.chain_id
+
+
+def test_concurrent_requests():
+    provider = _start_provider(slow_every=1)
+    try:
+        web3 = Web3(FailoverHTTPProvider(EndpointPool([provider.url], concurrency=8)))
+        start = monotonic()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            chain_ids = list(executor.map(lambda _: web3.eth.chain_id, range(8)))
+        elapsed = monotonic() - start
+    finally:
+        provider.shutdown()
+    assert chain_ids == [1] * 8
+    assert elapsed < SLOW_DELAY * 2
+
+
+def _without_license_header(path):
+    with open(path) as f:
+        lines = f.readlines()
+    return ''.join(lines[next(i for i, line in enumerate(lines) if not line.startswith('#')):])
+
+
+def test_metrics_copy_is_identical():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert _without_license_header(os.path.join(root, 'proxy', 'eth_failover.py')) == \
+        _without_license_header(os.path.join(root, 'metrics', 'src', 'eth_failover.py'))
@@ -0,0 +1,135 @@
+import os
+import gzip
+import json
+import logging
+from time import monotonic
+
+import brotli
+import pytest
+from jinja2 import Environment
+
+from proxy.config import UPSTREAM_NGINX_TEMPLATE
+from proxy.helper import (
+    TemplateRenderer, publish_json, read_json, write_json, write_changed_files,
+    remove_stale_files
+)
+
+logger = logging.getLogger(__name__)
+
+
+def test_write_changed_files(tmp_path):
+    files = {'a.conf': 'a', 'b.conf': 'b'}
+    assert write_changed_files(str(tmp_path), files) == ['a.conf', 'b.conf']
+    assert write_changed_files(str(tmp_path), files) == []
+
+    mtime = os.stat(tmp_path / 'a.conf').st_mtime_ns
+    assert write_changed_files(str(tmp_path), {**files, 'b.conf': 'b2'}) == ['b.conf']
+    assert (tmp_path / 'b.conf').read_text() == 'b2'
+    assert os.stat(tmp_path / 'a.conf').st_mtime_ns == mtime
+    assert sorted(os.listdir(tmp_path)) == ['a.conf', 'b.conf']
+
+
+def test_remove_stale_files(tmp_path):
+    write_changed_files(str(tmp_path), {'a.conf': 'a', 'b.conf': 'b', 'notes.txt': ''})
+    assert remove_stale_files(str(tmp_path), keep={'a.conf'}, suffix='.conf') == ['b.conf']
+    assert sorted(os.listdir(tmp_path)) == ['a.conf', 'notes.txt']
+
+
+def _synthetic_upstream(port):
+    return {
+        'balancing': 'ip_hash;',
+        'servers': [
+            {'address': f'node-{j}.skale.test{port}', 'weight': 8, 'backup': False}
+            for j in range(16)
+        ]
+    }
+
+
+def _synthetic_chains_info(chains_number):
+    return [
+        {
+            'schain_name': f'chain-{i}',
+            'http_upstream': _synthetic_upstream(':10003'),
+            'ws_upstream': _synthetic_upstream(':10002'),
+            'fs_upstream': _synthetic_upstream(''),
+            'settings': {'keepalive': 256, 'keepalive_requests': 10000, 'keepalive_timeout': 60}
+        }
+        for i in range(chains_number)
+    ]
+
+
+def test_template_renderer(tmp_path):
+    template_path = tmp_path / 'test.j2'
+    template_path.write_text('{{ schain_name }}')
+    renderer = TemplateRenderer()
+    assert renderer.render(str(template_path), {'schain_name': 'a'}) == 'a'
+    assert renderer.render(str(template_path), {'schain_name': 'b'}) == 'b'
+    assert renderer.compilations == 1
+
+    template_path.write_text('new {{ schain_name }}')
+    os.utime(template_path, ns=(0, os.stat(template_path).st_mtime_ns + 1))
+    assert renderer.render(str(template_path), {'schain_name': 'a'}) == 'new a'
+    assert renderer.compilations == 2
+
+
+def test_render_many_benchmark():
+    chains_info = _synthetic_chains_info(500)
+    renderer = TemplateRenderer()
+
+    start = monotonic()
+    rendered = []
+    for chain_info in chains_info:
+        with open(UPSTREAM_NGINX_TEMPLATE) as template_file:
+            template = Environment().from_string(template_file.read())
+        rendered.append(template.render(chain_info))
+    uncached = monotonic() - start
+
+    start = monotonic()
+    assert renderer.render_many(UPSTREAM_NGINX_TEMPLATE, chains_info) == rendered
+    cached = monotonic() - start
+    logger.info(f'500 chains rendered in {cached:.3f}s, {uncached:.3f}s without template cache')
+    assert renderer.compilations == 1
+    assert cached < uncached
+
+
+def test_write_json_atomic(tmp_path, monkeypatch):
+    path = tmp_path / 'chains.json'
+    write_json(str(path), [{'schain_name': 'a'}])
+
+    def failing_fsync(*args, **kwargs):
+        raise OSError('disk is full')
+    monkeypatch.setattr('proxy.helper.os.fsync', failing_fsync)
+    with pytest.raises(OSError):
+        write_json(str(path), [{'schain_name': 'b'}])
+    assert read_json(str(path)) == [{'schain_name': 'a'}]
+    assert os.listdir(tmp_path) == ['chains.json']
+
+
+def test_publish_json(tmp_path):
+    path = str(tmp_path / 'chains.json')
+    content = [{'chain_info': chain_info} for chain_info in _synthetic_chains_info(100)]
+    assert publish_json(path, content)
+    assert read_json(path) == content
+    with gzip.open(f'{path}.gz') as f:
+        assert json.load(f) == content
+    assert json.loads(brotli.decompress((tmp_path / 'chains.json.br').read_bytes())) == content
+
+    mtime = os.stat(path).st_mtime_ns
+    assert not publish_json(path, content)
+    assert os.stat(path).st_mtime_ns == mtime
+    assert publish_json(path, content[:1])
+
+
+def test_publish_json_benchmark(tmp_path):
+    content = [{'chain_info': chain_info} for chain_info in _synthetic_chains_info(100)]
+    start = monotonic()
+    indented = json.dumps(content, indent=4)
+    indented_time = monotonic() - start
+    start = monotonic()
+    publish_json(str(tmp_path / 'chains.json'), content)
+    publish_time = monotonic() - start
+    sizes = {p.name: p.stat().st_size for p in tmp_path.iterdir()}
+    logger.info(f'100 chains: indent=4 {len(indented)}B in {indented_time:.4f}s, \
+published {sizes} in {publish_time:.4f}s')
+    assert sizes['chains.json'] < len(indented)
+    assert sizes['chains.json.gz'] < sizes['chains.json'] / 5
@@ -0,0 +1,114 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+
+import pytest
+import requests
+
+from proxy.helper import (
+    BatchRejected, create_session, make_batch_rpc_call, post_request
+)
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_NUMBER = 200
+
+
+class CountingRpcHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            fail = self.server.failures > 0
+            self.server.failures -= fail
+        if fail:
+            return self._reply(503, b'')
+        if isinstance(body, list):
+            if self.server.reject_batches:
+                return self._reply(400, b'{"error": "batches are not supported"}')
+            result = [self._result(call) for call in reversed(body)]
+        else:
+            result = self._result(body)
+        self._reply(200, json.dumps(result).encode())
+
+    def _result(self, call):
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': call['method']}
+
+    def _reply(self, status, content):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rpc_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CountingRpcHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.failures = 0
+    server.reject_batches = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    yield server
+    server.shutdown()
+
+
+def _payload(method):
+    return {'jsonrpc': '2.0', 'method': method, 'params': [], 'id': 1}
+
+
+def test_post_request(rpc_server):
+    resp = post_request(rpc_server.url, json=_payload('eth_blockNumber'))
+    assert resp.json()['result'] == 'eth_blockNumber'
+    rpc_server.failures = 1
+    assert post_request(rpc_server.url, json=_payload('eth_chainId')).status_code == 200
+
+
+def test_make_batch_rpc_call(rpc_server):
+    calls = [('eth_blockNumber', None), ('eth_chainId', []), ('net_version', [])]
+    responses = make_batch_rpc_call(rpc_server.url, calls)
+    assert [r['result'] for r in responses] == [method for method, _ in calls]
+    assert make_batch_rpc_call('http://127.0.0.1:1', calls) is None
+    rpc_server.failures = 3
+    assert make_batch_rpc_call(rpc_server.url, calls) is None
+    rpc_server.reject_batches = True
+    with pytest.raises(BatchRejected):
+        make_batch_rpc_call(rpc_server.url, calls)
+
+
+def test_pooled_session_benchmark(rpc_server):
+    start = monotonic()
+    for _ in range(REQUESTS_NUMBER):
+        requests.post(rpc_server.url, json=_payload('eth_blockNumber'), timeout=5)
+    plain_time, plain_connections = monotonic() - start, rpc_server.connections
+
+    rpc_server.connections = 0
+    start = monotonic()
+    for _ in range(REQUESTS_NUMBER):
+        post_request(rpc_server.url, json=_payload('eth_blockNumber'))
+    pooled_time, pooled_connections = monotonic() - start, rpc_server.connections
+
+    logger.info(f'{REQUESTS_NUMBER} requests: plain {plain_connections} connections \
+in {plain_time:.3f}s, pooled {pooled_connections} connections in {pooled_time:.3f}s')
+    assert plain_connections == REQUESTS_NUMBER
+    assert pooled_connections <= 1
+
+
+def test_session_retries_with_backoff(rpc_server):
+    rpc_server.failures = 2
+    session = create_session(retries=1, backoff=0)
+    assert session.post(rpc_server.url, json=_payload('eth_chainId')).status_code == 503
+    assert session.post(rpc_server.url, json=_payload('eth_chainId')).status_code == 200
@@ -0,0 +1,83 @@
+import pytest
+
+from proxy import main
+from proxy.main import ProxyLoop
+
+KNOWN_ENDPOINTS = [{'nodes': [], 'chain_info': {'schain_name': 'chain-0', 'http_endpoints': []}}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def proxy_loop(monkeypatch):
+    clock = FakeClock()
+    calls = {'scans': 0, 'health': 0, 'published': 0, 'topology': 0}
+
+    def generate_endpoints(*args):
+        calls['scans'] += 1
+        raise ConnectionError('ETH endpoints are down')
+
+    def refresh_chains_info(schains_endpoints):
+        calls['health'] += 1
+        return True
+
+    def topology_changed(registry_cache):
+        calls['topology'] += 1
+        return True
+
+    monkeypatch.setattr(main, 'monotonic', clock)
+    monkeypatch.setattr(main, 'generate_endpoints', generate_endpoints)
+    monkeypatch.setattr(main, 'refresh_chains_info', refresh_chains_info)
+    monkeypatch.setattr(main, 'topology_changed', topology_changed)
+    monkeypatch.setattr(main, 'REGISTRY_EVENT_UPDATES', True)
+    monkeypatch.setattr(
+        main, 'publish_endpoints', lambda e: calls.update(published=calls['published'] + 1))
+    monkeypatch.setattr(main, 'send_heartbeat', lambda url: None)
+    proxy_loop = ProxyLoop(registry_cache=None, scan_interval=7200, retry_interval=60)
+    proxy_loop.schains_endpoints = KNOWN_ENDPOINTS
+    return proxy_loop, clock, calls
+
+
+def test_failed_scan_backoff(proxy_loop):
+    proxy_loop, clock, calls = proxy_loop
+    proxy_loop.tick()
+    assert calls['scans'] == 1
+    assert proxy_loop.next_scan_ts == clock.now + 60
+
+    for _ in range(5):
+        clock.now += 10
+        proxy_loop.tick()
+    assert calls == {'scans': 1, 'health': 5, 'published': 5, 'topology': 0}
+
+    clock.now += 10
+    proxy_loop.tick()
+    assert calls['scans'] == 2
+    assert proxy_loop.next_scan_ts == clock.now + 120
+
+    proxy_loop.failures = 20
+    clock.now = proxy_loop.next_scan_ts
+    proxy_loop.tick()
+    assert proxy_loop.next_scan_ts == clock.now + 7200
+    assert proxy_loop.schains_endpoints == KNOWN_ENDPOINTS
+
+
+def test_successful_scan_resets_backoff(proxy_loop, monkeypatch):
+    proxy_loop, clock, calls = proxy_loop
+    proxy_loop.tick()
+    collected = [{'chain_info': {'schain_name': 'chain-1'}}]
+    monkeypatch.setattr(main, 'generate_endpoints', lambda *args: collected)
+    clock.now = proxy_loop.next_scan_ts
+    proxy_loop.tick()
+    assert proxy_loop.failures == 0
+    assert proxy_loop.schains_endpoints == collected
+    assert proxy_loop.next_scan_ts == clock.now + 7200
+
+    clock.now += 10
+    proxy_loop.tick()
+    assert calls['topology'] == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from proxy import monitoring
+from proxy.endpoints import ChainInfo
+from proxy.probe import ProbeResult
+from proxy.sync_scoring import TIMESTAMP_LAG, UNREACHABLE
+
+
+def _sample(name, **labels):
+    return monitoring.registry.get_sample_value(name, labels) or 0
+
+
+def test_time_stage():
+    before = _sample('proxy_stage_duration_seconds_count', stage='render')
+    with monitoring.time_stage('render'):
+        pass
+    with pytest.raises(ValueError):
+        with monitoring.time_stage('render'):
+            raise ValueError('render failed')
+    assert _sample('proxy_stage_duration_seconds_count', stage='render') == before + 2
+    assert _sample('proxy_stage_failures_total', stage='render') >= 1
+
+
+def test_chains_health_gauges():
+    def schain_endpoints(name, healthy, nodes):
+        return {
+            'nodes': [{}] * nodes,
+            'chain_info': {'schain_name': name, 'http_endpoints': ['node:10003'] * healthy}
+        }
+
+    monitoring.observe_chain_discovery('chain-1', 0.5)
+    assert _sample('proxy_chain_last_discovery_duration_seconds', chain='chain-1') == 0.5
+    monitoring.set_chains_health([
+        schain_endpoints('chain-0', healthy=4, nodes=4),
+        schain_endpoints('chain-1', healthy=1, nodes=4)
+    ])
+    assert _sample('proxy_chain_healthy_endpoints', chain='chain-1') == 1
+    assert _sample('proxy_chain_nodes', chain='chain-1') == 4
+
+    monitoring.set_chains_health([schain_endpoints('chain-0', healthy=3, nodes=4)])
+    assert _sample('proxy_chain_healthy_endpoints', chain='chain-0') == 3
+    assert monitoring.registry.get_sample_value(
+        'proxy_chain_healthy_endpoints', {'chain': 'chain-1'}) is None
+    assert monitoring.registry.get_sample_value(
+        'proxy_chain_last_discovery_duration_seconds', {'chain': 'chain-1'}) is None
+
+
+def test_dropped_nodes():
+    nodes = [
+        {
+            'http_endpoint_domain': f'http://node-{i}.skale.test:10003',
+            'ws_endpoint_domain': f'ws://node-{i}.skale.test:10004',
+            'domain': f'node-{i}.skale.test'
+        }
+        for i in range(3)
+    ]
+    probes = [
+        ProbeResult(alive=True, block_ts=1700000000, block_number=100, rtt=0.01),
+        ProbeResult(alive=False),
+        ProbeResult(alive=True, block_ts=1600000000, block_number=1, rtt=0.01)
+    ]
+    unreachable = _sample('proxy_dropped_nodes_total', reason=UNREACHABLE)
+    out_of_sync = _sample('proxy_dropped_nodes_total', reason=TIMESTAMP_LAG)
+    assert ChainInfo('chain-0', nodes, probes).http_endpoints == ['node-0.skale.test:10003']
+    assert _sample('proxy_dropped_nodes_total', reason=UNREACHABLE) == unreachable + 1
+    assert _sample('proxy_dropped_nodes_total', reason=TIMESTAMP_LAG) == out_of_sync + 1
@@ -0,0 +1,184 @@
+import os
+from collections import namedtuple
+
+import docker
+import pytest
+
+import proxy.nginx as nginx
+from proxy.nginx import (
+    NginxContainerHandle, compose_upstream, generate_nginx_configs, update_nginx_configs
+)
+from proxy.nginx_reload import NginxReloadManager
+
+ExecResult = namedtuple('ExecResult', ['exit_code', 'output'])
+
+
+def _chain_info(schain_name, backup=(False, False, True)):
+    hosts = [f'node-{i}.skale.network' for i in range(len(backup))]
+    return {
+        'schain_name': schain_name,
+        'chain_id': '0x1',
+        'http_endpoints': [f'{host}:10003' for host in hosts],
+        'ws_endpoints': [f'{host}:10004' for host in hosts],
+        'fs_endpoints': hosts,
+        'weights': [8, 4, 1],
+        'backup': list(backup)
+    }
+
+
+def test_compose_upstream():
+    chain_info = _chain_info('chain-0')
+    upstream = compose_upstream(chain_info, 'http', 'least_conn')
+    assert upstream['balancing'] == 'least_conn;'
+    assert [s['backup'] for s in upstream['servers']] == [False, False, True]
+
+    upstream = compose_upstream(chain_info, 'http', 'ip_hash')
+    assert not any(s['backup'] for s in upstream['servers'])
+    assert [s['weight'] for s in upstream['servers']] == [8, 4, nginx.MIN_UPSTREAM_WEIGHT]
+
+
+def test_compose_upstream_addresses():
+    chain_info = _chain_info('chain-0')
+    chain_info['http_addresses'] = [
+        '10.0.0.1:10003', '10.0.0.2:10003', 'node-2.skale.network:10003'
+    ]
+    upstream = compose_upstream(chain_info, 'http', 'least_conn')
+    assert [s['address'] for s in upstream['servers']] == chain_info['http_addresses']
+    assert [s['domain'] for s in upstream['servers']] == [
+        'node-0.skale.network:10003', 'node-1.skale.network:10003', None
+    ]
+    upstream = compose_upstream(chain_info, 'ws', 'least_conn')
+    assert [s['address'] for s in upstream['servers']] == chain_info['ws_endpoints']
+    assert not any(s['domain'] for s in upstream['servers'])
+
+
+class RunningNginxContainer:
+    status = 'running'
+
+    def exec_run(self, cmd):
+        return ExecResult(0, b'')
+
+
+def test_update_nginx_configs(tmp_path, monkeypatch):
+    chains_folder, upstreams_folder = tmp_path / 'chains', tmp_path / 'upstreams'
+    chains_folder.mkdir()
+    upstreams_folder.mkdir()
+    monkeypatch.setattr(nginx, 'CHAINS_FOLDER', str(chains_folder))
+    monkeypatch.setattr(nginx, 'UPSTREAMS_FOLDER', str(upstreams_folder))
+    manager = NginxReloadManager(
+        RunningNginxContainer, str(tmp_path / 'staging'), min_interval=0)
+    monkeypatch.setattr(nginx, 'reload_manager', manager)
+
+    endpoints = [{'chain_info': _chain_info(f'chain-{i}')} for i in range(3)]
+    assert generate_nginx_configs(endpoints)
+    assert os.listdir(chains_folder) == []
+    update_nginx_configs(endpoints)
+    assert sorted(os.listdir(chains_folder)) == ['chain-0.conf', 'chain-1.conf', 'chain-2.conf']
+    assert not generate_nginx_configs(endpoints)
+
+    endpoints[0]['chain_info']['http_addresses'] = ['10.0.0.1:10003'] * 3
+    update_nginx_configs(endpoints)
+    upstream = (upstreams_folder / 'chain-0.conf').read_text()
+    assert 'server 10.0.0.1:10003 weight=8' in upstream
+    assert '# node-0.skale.network:10003' in upstream
+
+    update_nginx_configs(endpoints[:2])
+    assert sorted(os.listdir(upstreams_folder)) == [
+        nginx.RPC_CACHE_CONFIG, 'chain-0.conf', 'chain-1.conf'
+    ]
+    assert manager.stats()['reloads'] == 3
+
+
+def test_chain_without_servers(tmp_path, monkeypatch):
+    chains_folder, upstreams_folder = tmp_path / 'chains', tmp_path / 'upstreams'
+    chains_folder.mkdir()
+    upstreams_folder.mkdir()
+    monkeypatch.setattr(nginx, 'CHAINS_FOLDER', str(chains_folder))
+    monkeypatch.setattr(nginx, 'UPSTREAMS_FOLDER', str(upstreams_folder))
+    monkeypatch.setattr(nginx, 'reload_manager', NginxReloadManager(
+        RunningNginxContainer, str(tmp_path / 'staging'), min_interval=0))
+
+    endpoints = [{'chain_info': _chain_info(f'chain-{i}')} for i in range(2)]
+    update_nginx_configs(endpoints)
+    live_upstream = (upstreams_folder / 'chain-0.conf').read_text()
+
+    down = _chain_info('chain-0', backup=())
+    down['weights'] = []
+    new = _chain_info('chain-2', backup=())
+    new['weights'] = []
+    chain_configs, upstream_configs = nginx.render_nginx_configs(
+        [{'chain_info': down}, endpoints[1], {'chain_info': new}])
+    assert sorted(chain_configs) == ['chain-0.conf', 'chain-1.conf']
+    assert upstream_configs['chain-0.conf'] == live_upstream
+    assert 'chain-2.conf' not in upstream_configs
+
+
+def test_render_rpc_cache(monkeypatch):
+    monkeypatch.setattr(nginx, 'load_chain_overrides', lambda: {
+        '*': {'rpc_cache': True}, 'chain-1': {'rpc_cache': False}})
+    endpoints = [{'chain_info': _chain_info(f'chain-{i}')} for i in range(2)]
+    endpoints[0]['chain_info']['block_number'] = 0x2a3f0
+    chain_configs, upstream_configs = nginx.render_nginx_configs(endpoints)
+    assert 'proxy_cache rpc-chain-0;' in chain_configs['chain-0.conf']
+    assert 'proxy_pass http://$rpc_cache_upstream_chain_0/;' in chain_configs['chain-0.conf']
+    assert 'historical rpc_cache_check;' in upstream_configs['chain-0.conf']
+    assert 'proxy_pass http://chain-1/;' in chain_configs['chain-1.conf']
+    assert 'keys_zone=rpc-chain-0:' in upstream_configs['chain-0.conf']
+    assert 'proxy_cache' not in chain_configs['chain-1.conf']
+    assert 'proxy_cache' not in upstream_configs['chain-1.conf']
+    rpc_cache_config = upstream_configs[nginx.RPC_CACHE_CONFIG]
+    assert '$rpc_cache_class' in rpc_cache_config
+    assert "'~^/v1/chain-0(/|$)' 5;" in rpc_cache_config
+    assert '[0-9a-fA-F]{0,3})"\' historical;' in rpc_cache_config
+    assert 'chain-1' not in rpc_cache_config
+    assert 'js_content rpc_cache.check;' in rpc_cache_config
+
+
+class FakeContainer:
+    def __init__(self, client):
+        self.client = client
+        self.reloads = 0
+
+    def reload(self):
+        self.reloads += 1
+        if self.client.recreated:
+            raise docker.errors.NotFound('container is gone')
+
+
+class FakeDockerClient:
+    def __init__(self):
+        self.recreated = False
+        self.lookups = 0
+        self.containers = self
+
+    def get(self, name):
+        self.lookups += 1
+        self.recreated = False
+        return FakeContainer(self)
+
+
+def test_container_handle_is_cached():
+    client = FakeDockerClient()
+    handle = NginxContainerHandle('proxy_nginx', d_client=client)
+    container = handle.get()
+    assert handle.get() is container
+    assert client.lookups == 1
+    assert container.reloads == 0
+
+    assert handle.get(refresh=True) is container
+    assert container.reloads == 1
+
+    client.recreated = True
+    assert handle.get() is container
+    assert handle.get(refresh=True) is not container
+    assert client.lookups == 2
+
+
+def test_docker_client_is_lazy(monkeypatch):
+    def failing_client():
+        raise docker.errors.DockerException('no docker socket')
+
+    monkeypatch.setattr(docker, 'DockerClient', failing_client)
+    handle = NginxContainerHandle('proxy_nginx')
+    with pytest.raises(docker.errors.DockerException):
+        handle.get()
@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+import docker
+import pytest
+
+from proxy.helper import write_changed_files
+from proxy.nginx_reload import NginxReloadManager, read_config_tree
+
+ExecResult = namedtuple('ExecResult', ['exit_code', 'output'])
+
+
+class FakeNginxContainer:
+    def __init__(self, config_ok=True):
+        self.status = 'running'
+        self.config_ok = config_ok
+        self.commands = []
+        self.reloads = 0
+
+    def exec_run(self, cmd):
+        self._check_running()
+        if isinstance(cmd, list):
+            assert 'nginx -t -c' in cmd[-1]
+            cmd = 'nginx -t'
+        self.commands.append(cmd)
+        if cmd == 'nginx -t' and not self.config_ok:
+            return ExecResult(1, b'nginx: configuration file test failed')
+        return ExecResult(0, b'')
+
+    def restart(self):
+        self.status = 'running'
+
+    def kill(self, signal):
+        self._check_running()
+        self.commands.append(signal)
+
+    def reload(self):
+        self.reloads += 1
+
+    def _check_running(self):
+        if self.status != 'running':
+            raise docker.errors.APIError('container is not running')
+
+
+@pytest.fixture
+def config_folders(tmp_path):
+    folders = [tmp_path / 'upstreams', tmp_path / 'chains']
+    for folder in folders:
+        folder.mkdir()
+        write_changed_files(str(folder), {'chain-0.conf': 'valid'})
+    return [str(folder) for folder in folders]
+
+
+def _manager(container, tmp_path, **kwargs):
+    def get_container(refresh=False):
+        if refresh:
+            container.reload()
+        return container
+    return NginxReloadManager(get_container, str(tmp_path / 'staging'), **kwargs)
+
+
+def _trees(folders, content):
+    return {folder: {'chain-0.conf': content, 'chain-1.conf': content} for folder in folders}
+
+
+def test_reload_coalescing(config_folders, tmp_path):
+    container = FakeNginxContainer()
+    manager = _manager(container, tmp_path, min_interval=60)
+    assert not manager.maybe_reload()
+
+    assert manager.stage(_trees(config_folders, 'new'))
+    manager.request_reload()
+    manager.request_reload()
+    assert manager.maybe_reload()
+    assert container.commands == ['nginx -t', 'nginx -s reload']
+    assert read_config_tree(config_folders) == _trees(config_folders, 'new')
+    assert not manager.stage(_trees(config_folders, 'new'))
+
+    manager.request_reload()
+    assert not manager.maybe_reload()
+    assert manager.pending
+    assert len(container.commands) == 2
+
+    manager.min_interval = 0
+    assert manager.maybe_reload()
+    assert manager.stats()['reloads'] == 2
+    assert manager.stats()['last_reload_latency'] is not None
+    assert container.reloads == 0
+
+
+def test_reload_invalid_config(config_folders, tmp_path):
+    container = FakeNginxContainer(config_ok=False)
+    manager = _manager(container, tmp_path, min_interval=0)
+    live_tree = read_config_tree(config_folders)
+
+    assert manager.stage(_trees(config_folders, 'invalid'))
+    manager.request_reload()
+    assert not manager.maybe_reload()
+    assert container.commands == ['nginx -t']
+    assert read_config_tree(config_folders) == live_tree
+    assert manager.stats()['failures'] == 1
+    assert manager.stats()['rejected'] == 1
+
+
+def test_reload_stopped_container(config_folders, tmp_path):
+    container = FakeNginxContainer()
+    container.status = 'exited'
+    manager = _manager(container, tmp_path, min_interval=0)
+    live_tree = read_config_tree(config_folders)
+    manager.stage(_trees(config_folders, 'new'))
+    manager.request_reload()
+    assert not manager.maybe_reload()
+    assert container.status == 'running'
+    assert container.reloads == 1
+    assert container.commands == []
+    assert read_config_tree(config_folders) == live_tree
+
+    assert manager.maybe_reload()
+    assert container.commands == ['nginx -t', 'nginx -s reload']
+    assert read_config_tree(config_folders) == _trees(config_folders, 'new')
+
+
+def test_reload_by_signal(config_folders, tmp_path):
+    container = FakeNginxContainer()
+    manager = _manager(container, tmp_path, min_interval=0, reload_method='signal')
+    manager.stage(_trees(config_folders, 'new'))
+    manager.request_reload()
+    assert manager.maybe_reload()
+    assert container.commands == ['nginx -t', 'SIGHUP']
+
+    with pytest.raises(ValueError):
+        _manager(container, tmp_path, reload_method='restart')
@@ -0,0 +1,89 @@
+import json
+import logging
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+
+import pytest
+
+from proxy import probe
+from proxy.probe import probe_node, probe_nodes
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 1
+BLOCK = {'number': hex(100), 'timestamp': hex(1700000000)}
+
+
+class FakeSkaledHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        sleep(self.server.delay)
+        results = {'eth_getBlockByNumber': BLOCK, 'eth_syncing': False}
+        content = json.dumps([
+            {'jsonrpc': '2.0', 'id': call['id'], 'result': results[call['method']]}
+            for call in body
+        ]).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # probe timed out and closed the connection
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSkaledServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def _start_server(delay):
+    server = FakeSkaledServer(('127.0.0.1', 0), FakeSkaledHandler)
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def skaled_endpoints(monkeypatch):
+    monkeypatch.setattr(probe, 'PROBE_TIMEOUT', PROBE_TIMEOUT)
+    healthy, slow = _start_server(delay=0), _start_server(delay=PROBE_TIMEOUT * 3)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        dead_port = sock.getsockname()[1]
+    yield {
+        'healthy': f'http://127.0.0.1:{healthy.server_port}',
+        'slow': f'http://127.0.0.1:{slow.server_port}',
+        'dead': f'http://127.0.0.1:{dead_port}'
+    }
+    healthy.shutdown()
+    slow.shutdown()
+
+
+def test_probe_node(skaled_endpoints):
+    result = probe_node(skaled_endpoints['healthy'])
+    assert result.alive
+    assert result.block_number == 100
+    assert result.block_ts == 1700000000
+    assert result.rtt is not None
+    assert not probe_node(skaled_endpoints['slow']).alive
+    assert not probe_node(skaled_endpoints['dead']).alive
+
+
+def test_probe_nodes_worst_case(skaled_endpoints):
+    chains_number, nodes_per_chain = 16, 4
+    endpoints = [
+        skaled_endpoints[('healthy', 'healthy', 'slow', 'dead')[i % nodes_per_chain]]
+        for i in range(chains_number * nodes_per_chain)
+    ]
+    start = monotonic()
+    results = probe_nodes(endpoints)
+    elapsed = monotonic() - start
+    logger.info(f'Probed {len(endpoints)} nodes in {elapsed:.2f}s, \
+serial worst case: {chains_number * PROBE_TIMEOUT * 2}s')
+    assert [r.alive for r in results] == [i % nodes_per_chain < 2 for i in range(len(endpoints))]
+    assert elapsed < PROBE_TIMEOUT * 2
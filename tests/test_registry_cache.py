@@ -0,0 +1,57 @@
+from proxy.endpoints import collect_endpoints
+from proxy.registry_cache import RegistryCache
+
+from tests.conftest import FakeSkaleManager
+
+
+def _collect(skale_manager, block_number, registry_cache=None):
+    skale_manager.calls = 0
+    return collect_endpoints(
+        *skale_manager.contracts(), block_number=block_number, registry_cache=registry_cache)
+
+
+def test_registry_cache(tmp_path, healthy_nodes):
+    skale_manager = FakeSkaleManager(chains_number=8, nodes_number=8)
+    registry_cache = RegistryCache(str(tmp_path / 'registry_cache.json'))
+    endpoints = _collect(skale_manager, 1, registry_cache)
+    full_scan_calls = skale_manager.calls
+    assert registry_cache.block_number == 1
+
+    restarted_cache = RegistryCache(registry_cache.filepath)
+    assert restarted_cache.load()
+    assert _collect(skale_manager, 1, restarted_cache) == endpoints
+    assert skale_manager.calls == 0
+
+    skale_manager.node_records[3]['domain'] = 'node-3.rotated.skale.test'
+    refreshed = _collect(skale_manager, 2, restarted_cache)
+    assert refreshed == _collect(skale_manager, 2)
+    assert refreshed != endpoints
+    assert restarted_cache.block_number == 2
+
+    _collect(skale_manager, 3, restarted_cache)
+    assert skale_manager.calls < full_scan_calls
+
+
+def test_registry_cache_new_schain(tmp_path, healthy_nodes):
+    skale_manager = FakeSkaleManager(chains_number=4, nodes_number=8)
+    registry_cache = RegistryCache(str(tmp_path / 'registry_cache.json'))
+    _collect(skale_manager, 1, registry_cache)
+
+    new_hash = b'chain-new'
+    skale_manager.schain_hashes.append(new_hash)
+    skale_manager.groups[new_hash] = [0, 1, 2, 3]
+    for node_id in skale_manager.groups[new_hash]:
+        skale_manager.node_records[node_id]['schains'].append(new_hash)
+
+    endpoints = _collect(skale_manager, 2, registry_cache)
+    assert endpoints == _collect(skale_manager, 2)
+    assert endpoints[-1]['schain'][0] == 'chain-new'
+    assert set(registry_cache.nodes[0]['schain_hashes']) >= {new_hash}
+
+
+def test_registry_cache_corrupted_file(tmp_path):
+    filepath = tmp_path / 'registry_cache.json'
+    filepath.write_text('{"block_number": 1')
+    registry_cache = RegistryCache(str(filepath))
+    assert not registry_cache.load()
+    assert registry_cache.needs_full_refresh()
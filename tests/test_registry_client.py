@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from proxy.registry_client import RegistryClient
+from proxy.request_timings import RequestTimings
+
+ADDRESSES = {
+    'schains_internal_address': '0x' + '11' * 20,
+    'schains_address': '0x' + '22' * 20,
+    'nodes_address': '0x' + '33' * 20
+}
+
+
+class BlockNumberHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        content = json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': hex(42)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def eth_endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BlockNumberHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _write_abi(path, mtime):
+    abi = {**ADDRESSES, 'schains_internal_abi': [], 'schains_abi': [], 'nodes_abi': []}
+    path.write_text(json.dumps(abi))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_registry_client_reuses_contracts(tmp_path, eth_endpoint):
+    abi_path = tmp_path / 'abi.json'
+    _write_abi(abi_path, mtime=10 ** 18)
+    client = RegistryClient(
+        [f'http://127.0.0.1:{eth_endpoint.server_port}'], str(abi_path), RequestTimings())
+
+    contracts = client.contracts()
+    assert client.contracts() is contracts
+    assert client.abi_loads == 1
+
+    _write_abi(abi_path, mtime=2 * 10 ** 18)
+    assert client.contracts() is not contracts
+    assert client.abi_loads == 2
+
+
+def test_registry_client_request_timings(tmp_path, eth_endpoint):
+    client = RegistryClient(
+        [f'http://127.0.0.1:{eth_endpoint.server_port}'], str(tmp_path / 'abi.json'),
+        RequestTimings())
+    for _ in range(5):
+        assert client.block_number == 42
+    assert client.timings.stats()['eth_blockNumber']['calls'] == 5
+    assert eth_endpoint.connections == 1
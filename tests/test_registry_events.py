@@ -0,0 +1,160 @@
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import Web3
+
+from proxy import endpoints
+from proxy.endpoints import collect_endpoints
+from proxy.registry_cache import RegistryCache
+from proxy.registry_events import TopologyChanges, fetch_topology_changes
+
+from tests.conftest import FakeSkaleManager
+
+NODE_ROTATED_ABI = {
+    'type': 'event',
+    'name': 'NodeRotated',
+    'anonymous': False,
+    'inputs': [
+        {'name': 'schainHash', 'type': 'bytes32', 'indexed': False},
+        {'name': 'oldNode', 'type': 'uint256', 'indexed': False},
+        {'name': 'newNode', 'type': 'uint256', 'indexed': False}
+    ]
+}
+SCHAIN_DELETED_ABI = {
+    'type': 'event',
+    'name': 'SchainDeleted',
+    'anonymous': False,
+    'inputs': [
+        {'name': 'owner', 'type': 'address', 'indexed': False},
+        {'name': 'name', 'type': 'string', 'indexed': False},
+        {'name': 'schainHash', 'type': 'bytes32', 'indexed': True}
+    ]
+}
+TRANSFER_ABI = {
+    'type': 'event',
+    'name': 'Transfer',
+    'anonymous': False,
+    'inputs': [{'name': 'value', 'type': 'uint256', 'indexed': False}]
+}
+OWNER = '0x' + '44' * 20
+
+
+def _log(event_abi, values, block_number):
+    topics = [HexBytes(event_abi_to_log_topic(event_abi))]
+    types, data = [], []
+    for arg, value in zip(event_abi['inputs'], values):
+        if arg['indexed']:
+            topics.append(HexBytes(encode_abi([arg['type']], [value])))
+        else:
+            types.append(arg['type'])
+            data.append(value)
+    return {
+        'address': '0x' + '11' * 20,
+        'topics': topics,
+        'data': '0x' + encode_abi(types, data).hex(),
+        'blockNumber': block_number,
+        'blockHash': HexBytes(b'\x00' * 32),
+        'transactionHash': HexBytes(b'\x00' * 32),
+        'transactionIndex': 0,
+        'logIndex': 0
+    }
+
+
+class FakeEth:
+    def __init__(self, logs):
+        self.logs = logs
+        self.requests = []
+
+    def get_logs(self, params):
+        self.requests.append((params['fromBlock'], params['toBlock']))
+        return [
+            log for log in self.logs
+            if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']
+        ]
+
+
+class FakeWeb3:
+    def __init__(self, logs):
+        self.eth = FakeEth(logs)
+        self.codec = Web3().codec
+
+
+class FakeEventsContract:
+    def __init__(self, web3, abi):
+        self.web3 = web3
+        self.abi = abi
+        self.address = '0x' + '11' * 20
+
+
+def test_fetch_topology_changes():
+    chain_hash = b'\x01' * 32
+    web3 = FakeWeb3([
+        _log(NODE_ROTATED_ABI, [chain_hash, 3, 7], block_number=5),
+        _log(TRANSFER_ABI, [100], block_number=6),
+        _log(SCHAIN_DELETED_ABI, [OWNER, 'chain-1', b'\x02' * 32], block_number=25)
+    ])
+    contracts = (
+        FakeEventsContract(web3, [NODE_ROTATED_ABI, SCHAIN_DELETED_ABI]),
+        FakeEventsContract(web3, [TRANSFER_ABI])
+    )
+    changes = fetch_topology_changes(contracts, from_block=1, to_block=25, max_range=10)
+    assert web3.eth.requests == [(1, 10), (11, 20), (21, 25)]
+    assert changes.events == 2
+    assert changes.schain_list_changed
+    assert changes.schain_hashes == {chain_hash, b'\x02' * 32}
+    assert changes.node_ids == {3, 7}
+
+    assert fetch_topology_changes(contracts, from_block=7, to_block=20).is_empty
+
+
+def test_event_updates(tmp_path, healthy_nodes, monkeypatch):
+    skale_manager = FakeSkaleManager(chains_number=8, nodes_number=8)
+    registry_cache = RegistryCache(str(tmp_path / 'registry_cache.json'))
+    collect_endpoints(*skale_manager.contracts(), block_number=1, registry_cache=registry_cache)
+
+    rotated_hash = skale_manager.schain_hashes[1]
+    old_node = skale_manager.groups[rotated_hash][0]
+    new_node = next(
+        n for n in skale_manager.node_records if n not in skale_manager.groups[rotated_hash])
+    skale_manager.groups[rotated_hash][0] = new_node
+    skale_manager.node_records[old_node]['schains'].remove(rotated_hash)
+    skale_manager.node_records[new_node]['schains'].append(rotated_hash)
+
+    changes = TopologyChanges()
+    changes.add_event('NodeRotated', {
+        'schainHash': rotated_hash, 'oldNode': old_node, 'newNode': new_node})
+    monkeypatch.setattr(endpoints, 'REGISTRY_EVENT_UPDATES', True)
+    monkeypatch.setattr(endpoints, 'fetch_topology_changes', lambda *args: changes)
+
+    skale_manager.calls = 0
+    updated = collect_endpoints(
+        *skale_manager.contracts(), block_number=2, registry_cache=registry_cache)
+    event_calls = skale_manager.calls
+    assert updated == collect_endpoints(*skale_manager.contracts(), block_number=2)
+    assert [n['id'] for n in updated[1]['nodes']] == skale_manager.groups[rotated_hash]
+
+    monkeypatch.setattr(endpoints, 'REGISTRY_EVENT_UPDATES', False)
+    skale_manager.calls = 0
+    collect_endpoints(*skale_manager.contracts(), block_number=3, registry_cache=registry_cache)
+    assert event_calls < skale_manager.calls
+
+
+def test_event_updates_new_schain(tmp_path, healthy_nodes, monkeypatch):
+    skale_manager = FakeSkaleManager(chains_number=4, nodes_number=8)
+    registry_cache = RegistryCache(str(tmp_path / 'registry_cache.json'))
+    collect_endpoints(*skale_manager.contracts(), block_number=1, registry_cache=registry_cache)
+
+    new_hash = b'chain-new'
+    skale_manager.schain_hashes.append(new_hash)
+    skale_manager.groups[new_hash] = [0, 1, 2, 3]
+    for node_id in skale_manager.groups[new_hash]:
+        skale_manager.node_records[node_id]['schains'].append(new_hash)
+
+    changes = TopologyChanges()
+    changes.add_event('SchainCreated', {'name': 'chain-new', 'schainHash': new_hash})
+    monkeypatch.setattr(endpoints, 'REGISTRY_EVENT_UPDATES', True)
+    monkeypatch.setattr(endpoints, 'fetch_topology_changes', lambda *args: changes)
+    updated = collect_endpoints(
+        *skale_manager.contracts(), block_number=2, registry_cache=registry_cache)
+    assert updated == collect_endpoints(*skale_manager.contracts(), block_number=2)
+    assert updated[-1]['schain'][0] == 'chain-new'
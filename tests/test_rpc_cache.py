@@ -0,0 +1,81 @@
+import json
+import re
+
+import pytest
+
+from proxy.rpc_cache import (
+    HISTORICAL, IMMUTABLE, RECENT, UNCACHEABLE, block_digits, classify_request,
+    nginx_cache_buckets, nginx_class_patterns
+)
+
+TTL_ORDER = [UNCACHEABLE, RECENT, HISTORICAL, IMMUTABLE]
+HEAD_BLOCK = 0x2a3f0
+
+
+def _body(method, params, id=1, **fields):
+    return json.dumps({'jsonrpc': '2.0', 'method': method, 'params': params, 'id': id, **fields})
+
+
+def _nginx_classify(body, head_block=HEAD_BLOCK):
+    digits = block_digits(head_block)
+    for pattern, cache_class in nginx_class_patterns([digits]):
+        if re.search(pattern, f'{digits}|{body}'):
+            return cache_class
+    return UNCACHEABLE
+
+
+BODIES = [
+    (_body('eth_chainId', []), IMMUTABLE),
+    (_body('net_version', []), IMMUTABLE),
+    (_body('eth_getBlockByHash', ['0xabc', False]), RECENT),
+    (_body('eth_getBlockByNumber', ['0x1b4', True]), HISTORICAL),
+    (_body('eth_getBlockByNumber', ['0x0', True]), HISTORICAL),
+    (_body('eth_getBlockByNumber', ['0x2a3f1', True]), RECENT),
+    (_body('eth_getBlockByNumber', ['0xffffff', True]), RECENT),
+    (_body('eth_getBlockByNumber', ['latest', False]), RECENT),
+    (_body('eth_getBlockByNumber', [436, False]), RECENT),
+    (_body('eth_blockNumber', []), RECENT),
+    (_body('eth_call', [{'to': '0x1', 'data': '0x'}, 'latest']), RECENT),
+    (_body('eth_getTransactionReceipt', ['0xabc']), RECENT),
+    (_body('eth_getTransactionCount', ['0x1', 'pending']), UNCACHEABLE),
+    (_body('eth_sendRawTransaction', ['0xf86c']), UNCACHEABLE),
+    (_body('eth_chainIdx', []), UNCACHEABLE),
+    (json.dumps([json.loads(_body('eth_chainId', []))]), UNCACHEABLE),
+    ('', UNCACHEABLE),
+    ('{"method": ', UNCACHEABLE)
+]
+
+
+@pytest.mark.parametrize('body,cache_class', BODIES)
+def test_classify_request(body, cache_class):
+    assert classify_request(body, HEAD_BLOCK) == cache_class
+    assert _nginx_classify(body) == cache_class
+
+
+def test_nginx_patterns_are_conservative():
+    reordered = json.dumps({'params': ['0x1b4', True], 'id': 1, 'method': 'eth_getBlockByNumber'})
+    assert classify_request(reordered, HEAD_BLOCK) == HISTORICAL
+    assert _nginx_classify(reordered) == RECENT
+    compact = _body('eth_getBlockByNumber', ['0x1b4', True]).replace(' ', '')
+    assert _nginx_classify(compact) == HISTORICAL
+    below_head = _body('eth_getBlockByNumber', ['0x2a3ef', True])
+    assert classify_request(below_head, HEAD_BLOCK) == HISTORICAL
+    assert _nginx_classify(below_head) == RECENT
+    for body, _ in BODIES:
+        assert TTL_ORDER.index(_nginx_classify(body)) <= \
+            TTL_ORDER.index(classify_request(body, HEAD_BLOCK))
+
+
+def test_unknown_head_is_not_historical():
+    body = _body('eth_getBlockByNumber', ['0x1b4', True])
+    assert classify_request(body) == RECENT
+    assert _nginx_classify(body, head_block=-1) == RECENT
+
+
+def test_nginx_cache_buckets():
+    ttls = {IMMUTABLE: 3600, HISTORICAL: 90, RECENT: 0}
+    buckets = {cache_class: pattern for pattern, cache_class in nginx_cache_buckets(ttls)}
+    assert RECENT not in buckets
+    now = '2024-05-01T12:34:56+00:00'
+    assert re.match(buckets[IMMUTABLE], f'{IMMUTABLE}|{now}').group(1) == '2024-05-01T12'
+    assert re.match(buckets[HISTORICAL], f'{HISTORICAL}|{now}').group(1) == '2024-05-01T12:34'
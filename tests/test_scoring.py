@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from proxy.endpoints import ChainInfo
+from proxy.probe import ProbeResult
+from proxy.scoring import EndpointScore, EndpointStats, ScoreTracker, latency_weight_model
+
+
+def _stats(*rtts, block_lags=None):
+    block_lags = block_lags or [0] * len(rtts)
+    return [
+        EndpointStats(endpoint=f'http://node-{i}:10003', rtt=rtt, block_lag=lag)
+        for i, (rtt, lag) in enumerate(zip(rtts, block_lags))
+    ]
+
+
+def test_latency_weight_model():
+    assert latency_weight_model([]) == []
+    scores = latency_weight_model(_stats(0.1, 0.11, 0.25, 0.5))
+    assert [score.weight for score in scores] == [8, 8, 4, 2]
+    assert [score.backup for score in scores] == [False, False, False, True]
+
+
+def test_latency_weight_model_rtt_floor():
+    scores = latency_weight_model(_stats(0.001, 0.004, 0.019))
+    assert scores == [EndpointScore(weight=8)] * 3
+
+
+def test_latency_weight_model_block_lag():
+    scores = latency_weight_model(_stats(0.1, 0.1, block_lags=[0, 50]))
+    assert [score.backup for score in scores] == [False, True]
+    scores = latency_weight_model(_stats(0.1, 1.0, block_lags=[50, 0]))
+    assert [score.backup for score in scores] == [False, False]
+
+
+def test_chain_info_weight_model(skale_manager, healthy_nodes):
+    nodes = [
+        {
+            'domain': f'node-{i}.skale.test',
+            'http_endpoint_domain': f'http://node-{i}.skale.test:10003',
+            'ws_endpoint_domain': f'ws://node-{i}.skale.test:10002'
+        }
+        for i in range(3)
+    ]
+    probes = [
+        ProbeResult(alive=True, block_ts=1000, block_number=100, rtt=rtt)
+        for rtt in (0.1, 0.2, 1.0)
+    ]
+    chain_info = ChainInfo('chain-0', nodes, probes).to_dict()
+    assert chain_info['weights'] == [8, 4, 1]
+    assert chain_info['backup'] == [False, False, True]
+
+    chain_info = ChainInfo(
+        'chain-0', nodes, probes,
+        weight_model=lambda stats: [EndpointScore(weight=1) for _ in stats],
+        scores=ScoreTracker()
+    ).to_dict()
+    assert chain_info['weights'] == [1, 1, 1]
+
+
+def test_score_tracker_smooth_rtt():
+    tracker = ScoreTracker(alpha=0.5, change_threshold=0.25)
+    assert tracker.smooth_rtt('node-0', 0.1) == 0.1
+    assert tracker.smooth_rtt('node-0', 0.12) == 0.1
+    assert tracker.smooth_rtt('node-0', 0.3) == pytest.approx(0.205)
+    assert tracker.smooth_rtt('node-0', None) == pytest.approx(0.205)
+
+
+def test_score_tracker_hysteresis():
+    tracker = ScoreTracker(change_after=3)
+    endpoints = ['node-0', 'node-1']
+    initial = [EndpointScore(weight=8), EndpointScore(weight=4)]
+    changed = [EndpointScore(weight=8), EndpointScore(weight=2)]
+    assert tracker.stabilize(endpoints, initial) == initial
+    assert tracker.stabilize(endpoints, changed) == initial
+    assert tracker.stabilize(endpoints, initial) == initial
+    for _ in range(2):
+        assert tracker.stabilize(endpoints, changed) == initial
+    assert tracker.stabilize(endpoints, changed) == changed
+
+
+def test_score_tracker_jitter():
+    tracker = ScoreTracker()
+    rng = random.Random(1)
+    endpoints = [f'node-{i}' for i in range(16)]
+    base_rtts = [0.05 * (1 + i % 4) for i in range(16)]
+    changes, previous = 0, None
+    for _ in range(100):
+        stats = [
+            EndpointStats(endpoint, tracker.smooth_rtt(endpoint, rtt * rng.uniform(0.85, 1.15)), 0)
+            for endpoint, rtt in zip(endpoints, base_rtts)
+        ]
+        scores = tracker.stabilize(endpoints, latency_weight_model(stats))
+        changes += previous is not None and scores != previous
+        previous = scores
+    assert changes <= 2
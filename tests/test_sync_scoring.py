@@ -0,0 +1,57 @@
+import logging
+import random
+
+from proxy.probe import ProbeResult
+from proxy.sync_scoring import (
+    BLOCK_LAG, INFO_PORT, SYNCING, TIMESTAMP_LAG, UNREACHABLE, SyncTracker, check_sync
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_TS, MAX_BLOCK = 1700000000, 10000
+
+
+def _probe(**kwargs):
+    return ProbeResult(**{
+        'alive': True, 'block_ts': MAX_TS, 'block_number': MAX_BLOCK, 'rtt': 0.01, **kwargs})
+
+
+def test_check_sync():
+    assert check_sync(_probe(), MAX_TS, MAX_BLOCK).ok
+    assert check_sync(_probe(alive=False), MAX_TS, MAX_BLOCK).reasons == [UNREACHABLE]
+    assert check_sync(
+        _probe(block_ts=MAX_TS - 1000, block_number=MAX_BLOCK - 1000, syncing=True,
+               info_block_number=-1),
+        MAX_TS, MAX_BLOCK
+    ).reasons == [TIMESTAMP_LAG, BLOCK_LAG, SYNCING, INFO_PORT]
+    assert check_sync(_probe(info_block_number=None), MAX_TS, MAX_BLOCK).ok
+    assert check_sync(_probe(info_block_number=MAX_BLOCK - 1), MAX_TS, MAX_BLOCK).ok
+    assert check_sync(
+        _probe(info_block_number=MAX_BLOCK - 1000), MAX_TS, MAX_BLOCK
+    ).reasons == [INFO_PORT]
+
+
+def test_sync_tracker_hysteresis():
+    tracker = SyncTracker(evict_after=2, readmit_after=3)
+    assert not tracker.update('new-dead', False)
+    assert tracker.update('node', True)
+    assert tracker.update('node', False)
+    assert tracker.update('node', True)
+    assert tracker.update('node', False)
+    assert not tracker.update('node', False)
+    assert [tracker.update('node', ok) for ok in (True, True, False, True, True, True)] == \
+        [False, False, False, False, False, True]
+
+    tracker.retain({'node'})
+    assert tracker.update('new-dead', True)
+
+
+def test_sync_tracker_marginal_node():
+    rng = random.Random(42)
+    checks = [rng.random() > 0.2 for _ in range(1000)]
+    changes = {}
+    for name, tracker in (('plain', SyncTracker(1, 1)), ('hysteresis', SyncTracker(2, 3))):
+        states = [tracker.update('node', ok) for ok in checks]
+        changes[name] = sum(a != b for a, b in zip(states, states[1:]))
+    logger.info(f'Membership changes of a node failing 20% of checks: {changes}')
+    assert changes['hysteresis'] < changes['plain'] / 2
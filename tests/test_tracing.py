@@ -0,0 +1,68 @@
+import json
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from proxy import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(tracing, 'TRACE_EXPORTER', tracing.FILE_EXPORTER)
+    monkeypatch.setattr(tracing, 'TRACE_FILEPATH', str(path))
+    return path
+
+
+def _read_spans(path):
+    return [
+        json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+        for line in path.read_text().splitlines()
+    ]
+
+
+def test_nested_spans(trace_file):
+    with tracing.span('cycle', chains=2) as cycle:
+        with tracing.span('probe_nodes') as probe:
+            probe.set_attribute('dead', 1)
+    with pytest.raises(RuntimeError):
+        with tracing.span('reload_nginx'):
+            raise RuntimeError('exec failed')
+
+    probe_span, cycle_span, reload_span = _read_spans(trace_file)
+    assert probe_span['parentSpanId'] == cycle.span_id
+    assert probe_span['traceId'] == cycle_span['traceId'] == cycle.trace_id
+    assert probe_span['attributes'] == [{'key': 'dead', 'value': {'intValue': '1'}}]
+    assert 'parentSpanId' not in cycle_span
+    assert int(cycle_span['endTimeUnixNano']) >= int(probe_span['endTimeUnixNano'])
+    assert reload_span['traceId'] != cycle.trace_id
+    assert reload_span['status']['code'] == tracing.STATUS_ERROR
+
+
+def test_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'PROFILE_FOLDER', str(tmp_path))
+    with tracing.profile('cycle', enabled=False):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+    with tracing.profile('cycle', enabled=True):
+        sorted(range(1000), key=lambda x: -x)
+    dump, = tmp_path.iterdir()
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+
+def _worker_task(n):
+    return sorted(range(n), key=lambda x: -x)
+
+
+def test_profile_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'PROFILE_FOLDER', str(tmp_path))
+    task = tracing.profiled(_worker_task)
+    assert task(3) == [2, 1, 0]
+    with tracing.profile('cycle', enabled=True):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(task, [1000] * 4))
+    dump, = tmp_path.iterdir()
+    functions = {func for _, _, func in pstats.Stats(str(dump)).stats}
+    assert '_worker_task' in functions